@@ -4,17 +4,32 @@ Version 3.0 — Commandes restaurateur + Dashboard + Privacy Policy
 """
 
 import os
-import json
+import re
+import asyncio
+import gzip
 import logging
+import logging.handlers
+import random
 import hashlib
+import heapq
+import hmac
 import secrets
-from datetime import datetime, date, time, timedelta
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from queue import SimpleQueue
+from itertools import count, islice
+from operator import itemgetter
+from datetime import datetime, date, timedelta, timezone
 from contextlib import asynccontextmanager
+from typing import NamedTuple
 
 import anthropic
 import httpx
-from fastapi import FastAPI, Request, Response, BackgroundTasks
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import FastAPI, Request, Response, Depends, HTTPException
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # ==============================================================
@@ -32,13 +47,29 @@ DASHBOARD_SECRET = os.getenv("DASHBOARD_SECRET", secrets.token_urlsafe(32))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("restobot")
 
+
+def start_log_listener() -> logging.handlers.QueueListener:
+    """Move root handler I/O to a thread: the event loop only enqueues records."""
+    root = logging.getLogger()
+    listener = logging.handlers.QueueListener(SimpleQueue(), *root.handlers, respect_handler_level=True)
+    root.handlers = [logging.handlers.QueueHandler(listener.queue)]
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener: logging.handlers.QueueListener):
+    """Flush pending records and give the root logger its handlers back."""
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
+
 # ==============================================================
 # IN-MEMORY DATABASE
 # ==============================================================
 
 restaurants = {}
-conversations = {}
-bookings = []
+conversations = {}  # pid: OrderedDict of customer phone -> messages, most recently active last (backed by SQLite)
+bookings = deque(maxlen=10_000)  # oldest bookings are evicted automatically
+booking_ids = count(1)
 
 # Floor plan tables
 floor_tables = {}  # phone_number_id: [{"id": "T1", "seats": 4, "zone": "salle", ...}]
@@ -82,12 +113,31 @@ stats = {
 # SAMPLE RESTAURANT
 # ==============================================================
 
+def normalize_phone(phone: str) -> str:
+    """Keep digits only, so "+33 6 12..." matches WhatsApp's "33612..."."""
+    return re.sub(r"\D", "", phone)
+
+
+def register_restaurant(restaurant: dict):
+    """Add a restaurant and precompute what outbound calls reuse."""
+    restaurant["_headers"] = {
+        "Authorization": f"Bearer {restaurant['access_token']}",
+        "Content-Type": "application/json",
+    }
+    restaurant["_messages_path"] = f"/{restaurant['phone_number_id']}/messages"
+    restaurant["_owner_phones"] = frozenset(
+        normalize_phone(p) for p in [restaurant.get("owner_phone", "")] if p
+    )
+    set_static_prompt(restaurant)
+    restaurants[restaurant["phone_number_id"]] = restaurant
+
+
 def load_sample_restaurant():
     phone_number_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID", "1025551323971723")
     access_token = os.getenv("WHATSAPP_ACCESS_TOKEN", "")
     owner_phone = os.getenv("OWNER_PHONE", "")
 
-    restaurants[phone_number_id] = {
+    register_restaurant({
         "name": os.getenv("RESTAURANT_NAME", "Le Cosi Nice"),
         "phone_number_id": phone_number_id,
         "access_token": access_token,
@@ -104,7 +154,7 @@ def load_sample_restaurant():
             "booking_link": os.getenv("RESTAURANT_BOOKING_LINK", ""),
             "allergens_policy": "Nous prenons les allergies très au sérieux. Merci de préciser vos allergies, notre chef adapte les plats.",
         },
-    }
+    })
 
     # Init status
     restaurant_status[phone_number_id] = {
@@ -124,12 +174,12 @@ def load_sample_restaurant():
         "last_reset": date.today().isoformat(),
     }
 
-    logger.info(f"✅ Restaurant chargé : {restaurants[phone_number_id]['name']}")
-    logger.info(f"🔗 Dashboard URL : /dashboard/{DASHBOARD_SECRET}")
-    logger.info(f"🔑 Dashboard password : {DASHBOARD_PASSWORD}")
+    logger.info("✅ Restaurant chargé : %s", restaurants[phone_number_id]["name"])
+    logger.info("🔗 Dashboard URL : /dashboard/%s", DASHBOARD_SECRET)
+    logger.info("🔑 Dashboard password : %s", DASHBOARD_PASSWORD)
 
     # Init floor plan
-    floor_tables[phone_number_id] = json.loads(os.getenv("FLOOR_TABLES", json.dumps([
+    floor_tables[phone_number_id] = orjson.loads(os.getenv("FLOOR_TABLES") or orjson.dumps([
         {"id": "T1", "seats": 2, "zone": "salle", "x": 8, "y": 18, "shape": "round"},
         {"id": "T2", "seats": 2, "zone": "salle", "x": 22, "y": 18, "shape": "round"},
         {"id": "T3", "seats": 4, "zone": "salle", "x": 8, "y": 42, "shape": "rect"},
@@ -146,7 +196,7 @@ def load_sample_restaurant():
         {"id": "B1", "seats": 2, "zone": "bar", "x": 88, "y": 18, "shape": "round"},
         {"id": "B2", "seats": 2, "zone": "bar", "x": 88, "y": 38, "shape": "round"},
         {"id": "B3", "seats": 2, "zone": "bar", "x": 88, "y": 58, "shape": "round"},
-    ])))
+    ]))
 
     # Init table slots for today
     table_slots[phone_number_id] = {}
@@ -295,7 +345,7 @@ async def schedule_review_followup(phone_number_id: str, customer_phone: str, cu
         "scheduled_at": datetime.utcnow().isoformat(),
         "sent": False,
     })
-    logger.info(f"📋 Review followup scheduled for {customer_name} ({customer_phone})")
+    logger.info("📋 Review followup scheduled for %s (%s)", customer_name, customer_phone)
 
 
 async def send_review_request(phone_number_id: str, customer_phone: str, customer_name: str):
@@ -312,10 +362,8 @@ async def send_review_request(phone_number_id: str, customer_phone: str, custome
         f"Comment s'est passé votre repas ? Votre avis nous intéresse !"
     )
 
-    await send_whatsapp_message(
-        phone_number_id, restaurant["access_token"], customer_phone, message
-    )
-    logger.info(f"⭐ Review request sent to {customer_phone}")
+    await send_whatsapp_message(restaurant, customer_phone, message)
+    logger.info("⭐ Review request sent to %s", customer_phone)
 
 
 async def handle_review_response(phone_number_id: str, customer_phone: str, message_text: str) -> str | None:
@@ -462,7 +510,7 @@ async def handle_owner_command(phone_number_id: str, message: str) -> str:
             f"💬 Messages traités : {st.get('messages_today', 0)}\n"
             f"🍽️ Réservations : {st.get('bookings_today', 0)}\n"
             f"🌍 Langues : {', '.join(f'{l}: {c}' for l, c in st.get('languages', {}).items())}\n"
-            f"👥 Conversations actives : {sum(1 for k in conversations if k.startswith(phone_number_id))}"
+            f"👥 Conversations actives : {len(conversations.get(phone_number_id, {}))}"
         )
 
     # COMPLET CE SOIR
@@ -559,8 +607,54 @@ def get_claude():
     return claude_client
 
 
-def build_system_prompt(restaurant: dict, phone_number_id: str) -> str:
+def build_static_prompt(restaurant: dict) -> str:
+    """The part of the system prompt that only changes with the restaurant config."""
     ctx = restaurant["context"]
+    if ctx.get("booking_link"):
+        booking_section = f"\nRÉSERVATION : Si le client veut réserver, envoie-lui ce lien : {ctx['booking_link']}"
+    else:
+        booking_section = "\nRÉSERVATION : Si le client veut réserver, collecte : nombre de personnes, date, heure, nom. Confirme et dis que le restaurant va valider."
+
+    return f"""Tu es l'assistant virtuel du restaurant "{restaurant['name']}".
+
+RÔLE : Tu réponds aux clients sur WhatsApp de manière naturelle et chaleureuse.
+Tu parles comme un membre de l'équipe, pas comme un robot.
+
+TON : {ctx.get('tone', 'Professionnel mais chaleureux')}
+LANGUES : Réponds dans la langue du client. Tu parles {ctx.get('languages', 'français')}.
+
+INFORMATIONS DU RESTAURANT :
+- Description : {ctx.get('description', '')}
+- Adresse : {ctx.get('address', '')}
+- Téléphone : {ctx.get('phone', '')}
+- Horaires : {ctx.get('hours', '')}
+- Infos pratiques : {ctx.get('special_info', '')}
+
+MENU :
+{ctx.get('menu', 'Non renseigné')}
+
+ALLERGÈNES : {ctx.get('allergens_policy', 'Demander au restaurant')}
+{booking_section}
+
+RÈGLES STRICTES :
+- Ne JAMAIS inventer d'information. Si tu ne sais pas, dis-le et propose d'appeler le restaurant.
+- Sur les allergènes/santé : TOUJOURS recommander de confirmer directement avec le restaurant.
+- Reste dans ton rôle : tu ne parles QUE du restaurant et de sujets liés.
+- Si le message n'a rien à voir, redirige poliment.
+- Sois concis : 2-4 phrases max par réponse, sauf si le client pose plusieurs questions.
+- Si une demande est complexe ou urgente, propose de transférer au restaurant.
+"""
+
+
+def set_static_prompt(restaurant: dict):
+    """Rebuild on config change only: the cached Claude block and its digest for the reply cache."""
+    text = build_static_prompt(restaurant)
+    restaurant["_static_block"] = {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+    restaurant["_static_digest"] = hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def build_system_prompt(restaurant: dict, phone_number_id: str) -> list:
+    """System blocks: the cached static prompt, then today's status and availability."""
     status = restaurant_status.get(phone_number_id, {})
 
     # Build status context
@@ -592,53 +686,61 @@ def build_system_prompt(restaurant: dict, phone_number_id: str) -> str:
     if status.get("temp_message"):
         temp_msg = f"\n📢 MESSAGE DU RESTAURANT : {status['temp_message']}. Mentionne cette info si c'est pertinent pour le client."
 
-    booking_section = ""
-    if ctx.get("booking_link"):
-        booking_section = f"\nRÉSERVATION : Si le client veut réserver, envoie-lui ce lien : {ctx['booking_link']}"
-    else:
-        booking_section = "\nRÉSERVATION : Si le client veut réserver, collecte : nombre de personnes, date, heure, nom. Confirme et dis que le restaurant va valider."
-
     # Availability context from floor plan
     availability_context = build_availability_context(phone_number_id)
 
-    return f"""Tu es l'assistant virtuel du restaurant "{restaurant['name']}".
+    # Static block first, marked for Anthropic prompt caching: it is identical
+    # for every message until the config changes
+    system = [restaurant["_static_block"]]
+    dynamic = f"{status_context}\n{temp_msg}\n{availability_context}".strip()
+    if dynamic:
+        system.append({"type": "text", "text": dynamic})
+    return system
 
-RÔLE : Tu réponds aux clients sur WhatsApp de manière naturelle et chaleureuse.
-Tu parles comme un membre de l'équipe, pas comme un robot.
 
-TON : {ctx.get('tone', 'Professionnel mais chaleureux')}
-LANGUES : Réponds dans la langue du client. Tu parles {ctx.get('languages', 'français')}.
-{status_context}
-{temp_msg}
+CLAUDE_FALLBACK = "Désolé, je rencontre un petit souci technique. Le restaurant va vous répondre directement. 🙏"
 
-INFORMATIONS DU RESTAURANT :
-- Description : {ctx.get('description', '')}
-- Adresse : {ctx.get('address', '')}
-- Téléphone : {ctx.get('phone', '')}
-- Horaires : {ctx.get('hours', '')}
-- Infos pratiques : {ctx.get('special_info', '')}
+# Opening questions ("horaires ?", "adresse ?") get the same answer for a while;
+# keyed on the exact prompt bytes, so any config/status change misses naturally
+REPLY_CACHE_TTL = 600  # seconds
+REPLY_CACHE_MAX = 2000
+reply_cache = OrderedDict()  # key: (expires, reply), least recently used first
+reply_cache_hits = 0
 
-MENU :
-{ctx.get('menu', 'Non renseigné')}
 
-ALLERGÈNES : {ctx.get('allergens_policy', 'Demander au restaurant')}
-{booking_section}
-{availability_context}
+def reply_cache_key(restaurant: dict, system_prompt: list, message_text: str) -> bytes:
+    h = hashlib.blake2b(restaurant["_static_digest"], digest_size=16)
+    h.update(restaurant["phone_number_id"].encode())
+    for block in system_prompt[1:]:  # the static block is covered by its digest
+        h.update(b"\x1f" + block["text"].encode())
+    h.update(b"\x1e" + " ".join(message_text.lower().split()).encode())
+    return h.digest()
 
-RÈGLES STRICTES :
-- Ne JAMAIS inventer d'information. Si tu ne sais pas, dis-le et propose d'appeler le restaurant.
-- Sur les allergènes/santé : TOUJOURS recommander de confirmer directement avec le restaurant.
-- Reste dans ton rôle : tu ne parles QUE du restaurant et de sujets liés.
-- Si le message n'a rien à voir, redirige poliment.
-- Sois concis : 2-4 phrases max par réponse, sauf si le client pose plusieurs questions.
-- Si une demande est complexe ou urgente, propose de transférer au restaurant.
-"""
+
+def reply_cache_get(key: bytes) -> str | None:
+    global reply_cache_hits
+    hit = reply_cache.get(key)
+    if hit is None:
+        return None
+    if hit[0] < time.monotonic():
+        del reply_cache[key]
+        return None
+    reply_cache.move_to_end(key)
+    reply_cache_hits += 1
+    return hit[1]
+
+
+def reply_cache_put(key: bytes, reply: str):
+    reply_cache[key] = (time.monotonic() + REPLY_CACHE_TTL, reply)
+    reply_cache.move_to_end(key)
+    if len(reply_cache) > REPLY_CACHE_MAX:
+        reply_cache.popitem(last=False)
 
 
-async def ask_claude(system_prompt: str, messages: list) -> str:
+async def ask_claude(system_prompt: list, messages: list) -> str:
     try:
         client = get_claude()
-        response = await client.messages.create(
+        response = await client.beta.prompt_caching.messages.create(
             model=CLAUDE_MODEL,
             max_tokens=512,
             system=system_prompt,
@@ -647,20 +749,52 @@ async def ask_claude(system_prompt: str, messages: list) -> str:
         )
         return response.content[0].text
     except Exception as e:
-        logger.error(f"Claude API error: {e}")
-        return "Désolé, je rencontre un petit souci technique. Le restaurant va vous répondre directement. 🙏"
+        logger.error("Claude API error: %s", e)
+        return CLAUDE_FALLBACK
 
 
 # ==============================================================
 # WHATSAPP API
 # ==============================================================
 
-async def send_whatsapp_message(phone_number_id: str, access_token: str, to: str, text: str):
-    url = f"https://graph.facebook.com/{WHATSAPP_API_VERSION}/{phone_number_id}/messages"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+http_client = None
+
+
+def get_http():
+    """Shared Graph API client: pooled keep-alive connections over HTTP/2."""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            base_url=f"https://graph.facebook.com/{WHATSAPP_API_VERSION}",
+            # Fail fast when Graph is unreachable; responses may still take a while
+            timeout=httpx.Timeout(10.0, connect=2.0),
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=1,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=90.0),
+            ),
+        )
+    return http_client
+
+
+# Throttling, 5xx and dropped connections are transient on the Graph API: retry those,
+# fail fast on anything else (a 4xx will not get better)
+SEND_ATTEMPTS = 4
+SEND_BACKOFF_INITIAL = 0.2  # seconds, doubled per attempt
+SEND_BACKOFF_MAX = 3.0
+SEND_RETRY_AFTER_MAX = 10.0  # cap on Meta's Retry-After, the reply worker is waiting
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_delay(attempt: int, resp: httpx.Response | None) -> float:
+    """Retry-After when Meta sends one, otherwise exponential backoff with jitter."""
+    retry_after = resp.headers.get("retry-after", "") if resp is not None else ""
+    if retry_after.isdigit():
+        return min(float(retry_after), SEND_RETRY_AFTER_MAX)
+    return min(SEND_BACKOFF_MAX, SEND_BACKOFF_INITIAL * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+async def send_whatsapp_message(restaurant: dict, to: str, text: str):
     payload = {
         "messaging_product": "whatsapp",
         "recipient_type": "individual",
@@ -668,74 +802,139 @@ async def send_whatsapp_message(phone_number_id: str, access_token: str, to: str
         "type": "text",
         "text": {"body": text},
     }
-    async with httpx.AsyncClient() as client:
+    body = orjson.dumps(payload)
+    for attempt in range(SEND_ATTEMPTS):
+        resp = None
         try:
-            resp = await client.post(url, json=payload, headers=headers, timeout=10.0)
-            resp.raise_for_status()
-            logger.info(f"✅ Message envoyé à {to}")
+            resp = await get_http().post(restaurant["_messages_path"], content=body, headers=restaurant["_headers"])
+            if resp.status_code not in RETRYABLE_STATUS:
+                resp.raise_for_status()
+                logger.info("✅ Message envoyé à %s", to)
+                return
+            error = f"HTTP {resp.status_code}"
+        except httpx.TransportError as e:
+            error = e
         except httpx.HTTPError as e:
-            logger.error(f"❌ Erreur envoi WhatsApp: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"   Détail: {e.response.text}")
-
+            logger.error("❌ Erreur envoi WhatsApp: %s", e)
+            if getattr(e, "response", None) is not None:
+                logger.error("   Détail: %s", e.response.text)
+            return
+        if attempt + 1 < SEND_ATTEMPTS:
+            await asyncio.sleep(retry_delay(attempt, resp))
+    logger.error("❌ Erreur envoi WhatsApp après %s tentatives: %s", SEND_ATTEMPTS, error)
+    if resp is not None:
+        logger.error("   Détail: %s", resp.text)
+
+
+# Read receipts are best-effort: after more than READ_BREAKER_FAILURES failures within
+# READ_BREAKER_WINDOW seconds, stop sending them for READ_BREAKER_COOLDOWN seconds
+READ_BREAKER_FAILURES = 5
+READ_BREAKER_WINDOW = 60
+READ_BREAKER_COOLDOWN = 30
+read_failures = {}  # phone_number_id: (failures, first failure time)
+read_breaker_open_until = {}  # phone_number_id: time.monotonic() deadline
+
+
+async def mark_as_read(restaurant: dict, message_id: str):
+    pid = restaurant["phone_number_id"]
+    now = time.monotonic()
+    open_until = read_breaker_open_until.get(pid)
+    if open_until is not None:
+        if now < open_until:
+            return
+        del read_breaker_open_until[pid]
+        logger.info("✅ Accusés de lecture réactivés (%s)", pid)
 
-async def mark_as_read(phone_number_id: str, access_token: str, message_id: str):
-    url = f"https://graph.facebook.com/{WHATSAPP_API_VERSION}/{phone_number_id}/messages"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
     payload = {"messaging_product": "whatsapp", "status": "read", "message_id": message_id}
-    async with httpx.AsyncClient() as client:
-        try:
-            await client.post(url, json=payload, headers=headers, timeout=5.0)
-        except Exception:
-            pass
+    try:
+        resp = await get_http().post(restaurant["_messages_path"], content=orjson.dumps(payload), headers=restaurant["_headers"], timeout=httpx.Timeout(5.0, connect=2.0))
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        failures, since = read_failures.get(pid, (0, now))
+        if now - since > READ_BREAKER_WINDOW:
+            failures, since = 0, now
+        failures += 1
+        if failures > READ_BREAKER_FAILURES:
+            read_failures.pop(pid, None)
+            read_breaker_open_until[pid] = now + READ_BREAKER_COOLDOWN
+            logger.warning("⚠️ Accusés de lecture suspendus %ss (%s) : %s", READ_BREAKER_COOLDOWN, pid, e)
+        else:
+            read_failures[pid] = (failures, since)
+        return
+    read_failures.pop(pid, None)
 
 
-def parse_webhook(body: dict) -> dict | None:
-    try:
-        entry = body["entry"][0]
-        changes = entry["changes"][0]
-        value = changes["value"]
-        if "messages" not in value:
-            return None
-        message = value["messages"][0]
-        if message.get("type") != "text":
-            return None
-        return {
-            "phone_number_id": value["metadata"]["phone_number_id"],
-            "from": message["from"],
-            "message_id": message["id"],
-            "text": message["text"]["body"],
-            "name": value.get("contacts", [{}])[0].get("profile", {}).get("name", ""),
-        }
-    except (KeyError, IndexError) as e:
-        logger.warning(f"Parse error: {e}")
+class ParsedMessage(NamedTuple):
+    """The five webhook fields the reply path uses, as one immutable record."""
+    phone_number_id: str
+    sender: str
+    message_id: str
+    text: str
+    name: str = ""
+
+
+def parse_webhook(body: dict) -> ParsedMessage | None:
+    """Single .get() walk of the payload: missing keys end the walk instead of raising."""
+    value = ((body.get("entry") or [{}])[0].get("changes") or [{}])[0].get("value") or {}
+    messages = value.get("messages")
+    if not messages:
+        return None
+    message = messages[0]
+    if message.get("type") != "text":
         return None
+    phone_number_id = (value.get("metadata") or {}).get("phone_number_id")
+    sender = message.get("from")
+    message_id = message.get("id")
+    text = (message.get("text") or {}).get("body")
+    if not (phone_number_id and sender and message_id and text is not None):
+        logger.warning("Parse error: message incomplet %s", message_id)
+        return None
+    name = ((value.get("contacts") or [{}])[0].get("profile") or {}).get("name", "")
+    return ParsedMessage(phone_number_id, sender, message_id, text, name)
 
 
 # ==============================================================
 # CONVERSATION & STATS
 # ==============================================================
 
-def get_conversation(phone_number_id: str, customer_phone: str) -> list:
-    key = f"{phone_number_id}:{customer_phone}"
-    if key not in conversations:
-        conversations[key] = []
-    return conversations[key]
+_last_ts_sec = 0
+_last_ts_iso = ""
+
+
+def _now_iso() -> str:
+    """UTC ISO timestamp, formatted at most once per second."""
+    global _last_ts_sec, _last_ts_iso
+    s = int(time.time())
+    if s != _last_ts_sec:
+        _last_ts_sec = s
+        _last_ts_iso = datetime.fromtimestamp(s, tz=timezone.utc).isoformat()
+    return _last_ts_iso
+
+
+HISTORY_LENGTH = 20  # messages kept per conversation
+
+
+def get_conversation(phone_number_id: str, customer_phone: str) -> deque:
+    return conversations.get(phone_number_id, {}).get(customer_phone) or deque()
 
 
 def save_message(phone_number_id: str, customer_phone: str, role: str, content: str):
-    key = f"{phone_number_id}:{customer_phone}"
-    if key not in conversations:
-        conversations[key] = []
-    conversations[key].append({
+    threads = conversations.setdefault(phone_number_id, OrderedDict())
+    msgs = threads.get(customer_phone)
+    if msgs is None:
+        msgs = threads[customer_phone] = deque(maxlen=HISTORY_LENGTH)  # append evicts the oldest
+    # Stored in the shape the dashboard reads ("time" is UTC, "YYYY-MM-DD HH:MM"),
+    # so the API can return entries as they are
+    entry = {
         "role": role,
         "content": content,
-        "timestamp": datetime.utcnow().isoformat()
-    })
-    conversations[key] = conversations[key][-20:]
+        "time": _now_iso()[:16].replace("T", " "),
+    }
+    msgs.append(entry)
+    pending_messages.append((phone_number_id, customer_phone, role, content, entry["time"]))
+    threads.move_to_end(customer_phone)
+    if phone_number_id == dashboard_restaurant_id():
+        publish_event("message", {"phone": customer_phone, **entry})
 
 
 def track_stats(phone_number_id: str, is_booking: bool = False, language: str = "fr"):
@@ -753,6 +952,7 @@ def track_stats(phone_number_id: str, is_booking: bool = False, language: str =
     langs[language] = langs.get(language, 0) + 1
     st["languages"] = langs
     stats[phone_number_id] = st
+    publish_dashboard(phone_number_id)
 
 
 def track_contact(customer_phone: str, customer_name: str = "", language: str = "fr"):
@@ -781,17 +981,196 @@ def track_contact(customer_phone: str, customer_name: str = "", language: str =
             c["language"] = language
 
 
+def recent_bookings(n: int) -> list:
+    """Return the last n bookings, oldest first."""
+    return list(islice(reversed(bookings), n))[::-1]
+
+
+# Retention announced in the privacy policy
+CONVERSATION_RETENTION_DAYS = 90
+BOOKING_RETENTION_DAYS = 365
+
+
+def purge_expired_data() -> tuple:
+    """Drop conversations idle for 90 days and bookings older than 12 months.
+
+    Both structures are kept in chronological order, so only the expired head is visited.
+    """
+    now = datetime.now(timezone.utc)
+    conv_cutoff = (now - timedelta(days=CONVERSATION_RETENTION_DAYS)).isoformat(sep=" ")[:16]
+    removed_conversations = 0
+    for threads in conversations.values():
+        while threads and threads[next(iter(threads))][-1]["time"] < conv_cutoff:
+            threads.popitem(last=False)
+            removed_conversations += 1
+    booking_cutoff = (now - timedelta(days=BOOKING_RETENTION_DAYS)).date().isoformat()
+    removed_bookings = 0
+    while bookings and bookings[0].get("timestamp", "")[:10] < booking_cutoff:
+        bookings.popleft()
+        removed_bookings += 1
+    if removed_conversations:
+        revisions["dashboard"] += 1
+        revisions["conversations"] += 1
+    if removed_bookings:
+        revisions["bookings"] += 1
+    return removed_conversations, removed_bookings
+
+
+# ==============================================================
+# PERSISTENCE (SQLite, write-behind)
+# ==============================================================
+
+DB_PATH = os.getenv("DB_PATH", "restobot.db")  # ":memory:" for throwaway runs
+DB_FLUSH_INTERVAL = 0.2  # seconds between batched writes
+db = None
+db_lock = threading.Lock()  # writer and retention run in worker threads
+pending_messages = []  # (pid, phone, role, content, time) rows not yet on disk
+
+
+def open_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS messages (pid TEXT, phone TEXT, role TEXT, content TEXT, time TEXT)")
+    conn.execute("CREATE INDEX IF NOT EXISTS messages_thread ON messages (pid, phone, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS messages_time ON messages (time)")
+    return conn
+
+
+def load_conversations(conn: sqlite3.Connection) -> int:
+    """Rebuild the in-memory threads (last HISTORY_LENGTH messages each) after a restart."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=CONVERSATION_RETENTION_DAYS)).isoformat(sep=" ")[:16]
+    rows = conn.execute(
+        "SELECT pid, phone, role, content, time FROM ("
+        " SELECT *, rowid AS id, ROW_NUMBER() OVER (PARTITION BY pid, phone ORDER BY time DESC, rowid DESC) AS n"
+        " FROM messages WHERE time >= ?"
+        ") WHERE n <= ? ORDER BY time, id",
+        (cutoff, HISTORY_LENGTH),
+    )
+    loaded = 0
+    for pid, phone, role, content, msg_time in rows:
+        threads = conversations.setdefault(pid, OrderedDict())
+        msgs = threads.get(phone)
+        if msgs is None:
+            msgs = threads[phone] = deque(maxlen=HISTORY_LENGTH)
+        msgs.append({"role": role, "content": content, "time": msg_time})
+        threads.move_to_end(phone)
+        loaded += 1
+    return loaded
+
+
+def write_messages(rows: list):
+    with db_lock:
+        db.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def delete_expired_messages():
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=CONVERSATION_RETENTION_DAYS)).isoformat(sep=" ")[:16]
+    with db_lock:
+        db.execute("DELETE FROM messages WHERE time < ?", (cutoff,))
+
+
+def take_pending_messages() -> list:
+    """Swap the buffer on the event loop so save_message never appends mid-write."""
+    global pending_messages
+    rows, pending_messages = pending_messages, []
+    return rows
+
+
+async def db_writer_loop():
+    while True:
+        await asyncio.sleep(DB_FLUSH_INTERVAL)
+        if pending_messages:
+            rows = take_pending_messages()
+            try:
+                await asyncio.to_thread(write_messages, rows)
+            except sqlite3.Error as e:
+                logger.error("DB write error: %s", e)
+                pending_messages[:0] = rows
+
+
+# ==============================================================
+# LIVE DASHBOARD EVENTS (Server-Sent Events)
+# ==============================================================
+
+SSE_PING_INTERVAL = 25  # seconds, keeps proxies from closing an idle stream
+dashboard_listeners = set()  # one asyncio.Queue of encoded frames per open /api/stream
+
+# Every published event also bumps the revision of the API data it touches,
+# which gives the read endpoints a cheap ETag
+revisions = {"dashboard": 0, "conversations": 0, "bookings": 0}
+EVENT_REVISIONS = {
+    "dashboard": ("dashboard",),
+    "message": ("dashboard", "conversations"),
+    "booking": ("bookings",),
+}
+
+
+def dashboard_restaurant_id():
+    """The dashboard shows the first registered restaurant."""
+    return next(iter(restaurants), None)
+
+
+def publish_event(event: str, data: dict):
+    """Push an event to every connected dashboard; a client that falls behind loses the event."""
+    for key in EVENT_REVISIONS[event]:
+        revisions[key] += 1
+    if not dashboard_listeners:
+        return
+    frame = b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+    for listener in dashboard_listeners:
+        try:
+            listener.put_nowait(frame)
+        except asyncio.QueueFull:
+            pass
+
+
+def publish_dashboard(pid: str):
+    if pid != dashboard_restaurant_id():
+        return
+    if not dashboard_listeners:
+        revisions["dashboard"] += 1
+        return
+    publish_event("dashboard", {
+        "stats": stats.get(pid, {}),
+        "status": restaurant_status.get(pid, {}),
+        "conversations_count": len(conversations.get(pid, {})),
+    })
+
+
+def revision_etag(*keys: str) -> str:
+    # The date is part of it: daily stats reset on the first read of the day
+    return 'W/"' + "-".join(str(revisions[k]) for k in keys) + "-" + date.today().isoformat() + '"'
+
+
+def cached_json(request: Request, etag: str, build) -> Response:
+    """304 when the client already has this revision, otherwise build and send the JSON."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(build(), headers=headers)
+
+
 # ==============================================================
 # NOTIFICATION
 # ==============================================================
 
+# Owner booking alerts are batched: one WhatsApp per restaurant every OWNER_NOTIFY_INTERVAL seconds at most
+OWNER_NOTIFY_INTERVAL = int(os.getenv("OWNER_NOTIFY_INTERVAL", 5))
+owner_notifications = None  # asyncio.Queue of (restaurant, customer_phone, customer_name, message), created in lifespan
+
+# Compiled once: booking detection runs on every inbound message
+BOOKING_RE = re.compile(r"réserv|reserv|book|table|prenot", re.IGNORECASE)
+BOOKING_TIME_RE = re.compile(r"(\d{1,2})[h:](\d{2})?")
+BOOKING_COVERS_RE = re.compile(r"(\d+)\s*(?:pers|couv|place|people|pax)", re.IGNORECASE)
+
+
 async def notify_owner(restaurant: dict, customer_phone: str, customer_name: str, message: str):
-    booking_keywords = ["réserv", "reserv", "book", "table", "prenot"]
-    is_booking = any(kw in message.lower() for kw in booking_keywords)
+    is_booking = BOOKING_RE.search(message) is not None
     if is_booking:
+        lowered = message.lower()
         # Try to extract time from message for auto table assignment
-        import re
-        time_match = re.search(r'(\d{1,2})[h:](\d{2})?', message)
+        time_match = BOOKING_TIME_RE.search(message)
         booking_time = None
         if time_match:
             h = int(time_match.group(1))
@@ -801,17 +1180,17 @@ async def notify_owner(restaurant: dict, customer_phone: str, customer_name: str
             booking_time = f"{h:02d}:{m:02d}"
 
         # Try to extract covers
-        covers_match = re.search(r'(\d+)\s*(?:pers|couv|place|people|pax)', message.lower())
+        covers_match = BOOKING_COVERS_RE.search(message)
         covers = int(covers_match.group(1)) if covers_match else 2
 
         # Zone preference
         zone_pref = None
-        if "terrasse" in message.lower():
+        if "terrasse" in lowered:
             zone_pref = "terrasse"
-        elif "bar" in message.lower():
+        elif "bar" in lowered:
             zone_pref = "bar"
 
-        booking_id = f"R{len(bookings)+1}"
+        booking_id = f"R{next(booking_ids)}"
 
         # Auto assign table if time found
         assigned_table = None
@@ -826,7 +1205,7 @@ async def notify_owner(restaurant: dict, customer_phone: str, customer_name: str
             "phone": customer_phone,
             "name": customer_name or customer_phone,
             "message": message[:200],
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _now_iso(),
             "status": "confirmed" if assigned_table else "pending",
             "time": booking_time or "",
             "covers": covers,
@@ -834,29 +1213,50 @@ async def notify_owner(restaurant: dict, customer_phone: str, customer_name: str
             "zone": zone_pref,
             "source": "whatsapp",
         })
-        track_stats(restaurant["phone_number_id"], is_booking=True)
+        track_stats(pid, is_booking=True)
+        publish_event("booking", {"id": booking_id})
 
         # Schedule review followup
         await schedule_review_followup(pid, customer_phone, customer_name, booking_time or "")
 
-        logger.info(f"🍽️ Booking {booking_id}: {customer_name} {covers}p @ {booking_time} -> {assigned_table or 'unassigned'}")
+        logger.info("🍽️ Booking %s: %s %sp @ %s -> %s", booking_id, customer_name, covers, booking_time, assigned_table or "unassigned")
 
     if not restaurant.get("owner_phone"):
         return
     if is_booking:
-        notif = (
-            f"🍽️ Demande de réservation !\n\n"
-            f"👤 {customer_name or customer_phone}\n"
-            f"📱 {customer_phone}\n"
-            f"💬 \"{message[:200]}\"\n\n"
-            f"RestoBot a répondu automatiquement."
-        )
-        await send_whatsapp_message(
-            restaurant["phone_number_id"],
-            restaurant["access_token"],
-            restaurant["owner_phone"],
-            notif,
-        )
+        owner_notifications.put_nowait((restaurant, customer_phone, customer_name, message[:200]))
+
+
+def format_owner_notification(items: list) -> str:
+    """Combine queued booking requests into one message for the owner."""
+    if len(items) == 1:
+        header = "🍽️ Demande de réservation !"
+    else:
+        header = f"🍽️ {len(items)} demandes de réservation !"
+    lines = [
+        f"👤 {customer_name or customer_phone}\n"
+        f"📱 {customer_phone}\n"
+        f"💬 \"{message}\""
+        for _, customer_phone, customer_name, message in items
+    ]
+    return header + "\n\n" + "\n\n".join(lines) + "\n\nRestoBot a répondu automatiquement."
+
+
+async def flush_owner_notifications():
+    """Wait for at least one notification, then send everything queued, one message per restaurant."""
+    items = [await owner_notifications.get()]
+    try:
+        while True:
+            items.append(owner_notifications.get_nowait())
+    except asyncio.QueueEmpty:
+        pass
+
+    by_restaurant = {}
+    for item in items:
+        by_restaurant.setdefault(item[0]["phone_number_id"], []).append(item)
+    for batch in by_restaurant.values():
+        restaurant = batch[0][0]
+        await send_whatsapp_message(restaurant, restaurant["owner_phone"], format_owner_notification(batch))
 
 
 # ==============================================================
@@ -864,37 +1264,30 @@ async def notify_owner(restaurant: dict, customer_phone: str, customer_name: str
 # ==============================================================
 
 async def process_and_reply(
-    phone_number_id: str,
+    restaurant: dict,
     customer_phone: str,
     customer_name: str,
     message_text: str,
 ):
-    restaurant = restaurants.get(phone_number_id)
-    if not restaurant:
-        logger.warning(f"No restaurant for phone_number_id: {phone_number_id}")
-        return
+    phone_number_id = restaurant["phone_number_id"]
 
     # Check if message is from the owner
-    owner_phone = restaurant.get("owner_phone", "")
-    if owner_phone and customer_phone == owner_phone:
+    if normalize_phone(customer_phone) in restaurant["_owner_phones"]:
         response = await handle_owner_command(phone_number_id, message_text)
         if response is not None:
-            await send_whatsapp_message(
-                phone_number_id, restaurant["access_token"], customer_phone, response
-            )
-            logger.info(f"👨‍🍳 Commande propriétaire : {message_text[:50]}")
+            publish_dashboard(phone_number_id)
+            await send_whatsapp_message(restaurant, customer_phone, response)
+            logger.info("👨‍🍳 Commande propriétaire : %.50s", message_text)
             return
         # If None, it's not a command — process normally (owner asking as client)
 
     # Check if this is a response to a review request
     review_response = await handle_review_response(phone_number_id, customer_phone, message_text)
     if review_response:
-        await send_whatsapp_message(
-            phone_number_id, restaurant["access_token"], customer_phone, review_response
-        )
+        await send_whatsapp_message(restaurant, customer_phone, review_response)
         save_message(phone_number_id, customer_phone, "user", message_text)
         save_message(phone_number_id, customer_phone, "assistant", review_response)
-        logger.info(f"⭐ Review response from {customer_phone}: {message_text[:50]}")
+        logger.info("⭐ Review response from %s: %.50s", customer_phone, message_text)
         return
 
     # Build system prompt with current status
@@ -903,17 +1296,26 @@ async def process_and_reply(
     # Get conversation history
     history = get_conversation(phone_number_id, customer_phone)
 
-    # Build messages for Claude
-    claude_messages = []
-    for msg in history[-10:]:
-        claude_messages.append({"role": msg["role"], "content": msg["content"]})
+    # Build messages for Claude (stored entries carry a display time the API rejects, so project role/content)
+    claude_messages = [{"role": msg["role"], "content": msg["content"]} for msg in islice(history, max(0, len(history) - 10), None)]
     claude_messages.append({"role": "user", "content": message_text})
 
-    # Get AI response
-    response = await ask_claude(system_prompt, claude_messages)
+    # Get AI response; only a conversation's first message is cacheable,
+    # later turns depend on what was said before
+    cache_key = None if history else reply_cache_key(restaurant, system_prompt, message_text)
 
-    # Save to history
+    # Booking detection and the user turn only need the incoming text:
+    # run them while Claude is thinking instead of after the reply
     save_message(phone_number_id, customer_phone, "user", message_text)
+    notify_task = asyncio.create_task(notify_owner(restaurant, customer_phone, customer_name, message_text))
+
+    response = reply_cache_get(cache_key) if cache_key else None
+    if response is None:
+        response = await ask_claude(system_prompt, claude_messages)
+        if cache_key and response != CLAUDE_FALLBACK:
+            reply_cache_put(cache_key, response)
+
+    # Save to history
     save_message(phone_number_id, customer_phone, "assistant", response)
 
     # Track stats
@@ -922,32 +1324,118 @@ async def process_and_reply(
     # Track contact in CRM
     track_contact(customer_phone, customer_name)
 
-    # Send reply
-    await send_whatsapp_message(
-        phone_number_id, restaurant["access_token"], customer_phone, response
+    # Send reply; the owner notification has usually finished by now
+    await asyncio.gather(send_whatsapp_message(restaurant, customer_phone, response), notify_task)
+
+    logger.info("💬 [%s] %s: %.80s", restaurant["name"], customer_name or customer_phone, message_text)
+    logger.info("🤖 Réponse: %.80s", response)
+
+
+async def handle_incoming_message(
+    restaurant: dict,
+    customer_phone: str,
+    customer_name: str,
+    message_text: str,
+    message_id: str,
+):
+    """Send the read receipt while the reply is being generated, not before it."""
+    await asyncio.gather(
+        mark_as_read(restaurant, message_id),
+        process_and_reply(restaurant, customer_phone, customer_name, message_text),
     )
 
-    # Notify owner if booking
-    await notify_owner(restaurant, customer_phone, customer_name, message_text)
 
-    logger.info(f"💬 [{restaurant['name']}] {customer_name or customer_phone}: {message_text[:80]}")
-    logger.info(f"🤖 Réponse: {response[:80]}")
+# ==============================================================
+# REPLY QUEUE
+# ==============================================================
+
+# Messages wait in a per-customer backlog; reply_queue holds customer keys, and a key is
+# either queued or in the hands of one worker, never both. Two bubbles sent back to back
+# are therefore answered in order (the second reply sees the first exchange), while a
+# customer sending a burst only ever occupies one worker.
+REPLY_WORKERS = 8  # concurrent Claude + WhatsApp round-trips
+REPLY_QUEUE_SIZE = 1000  # pending messages; beyond this the webhook answers 503 and Meta redelivers later
+reply_queue = None  # asyncio.Queue of (pid, customer phone) keys, created in lifespan
+reply_backlogs = {}  # (pid, customer phone): deque of handle_incoming_message args
+pending_replies = 0
+seen_message_ids = OrderedDict()  # recent wamids, Meta may deliver the same message twice
+SEEN_MESSAGE_IDS_MAX = 5000
+
+
+def enqueue_reply(parsed: ParsedMessage) -> bool:
+    """Queue a parsed message for the reply workers; False when the queue is full."""
+    global pending_replies
+    message_id = parsed.message_id
+    if message_id in seen_message_ids:
+        return True
+    # Resolved once here; the workers get the restaurant itself, not its id
+    restaurant = restaurants.get(parsed.phone_number_id)
+    if not restaurant:
+        logger.warning("No restaurant for phone_number_id: %s", parsed.phone_number_id)
+        return True
+    if pending_replies >= REPLY_QUEUE_SIZE:
+        logger.warning("⚠️ File de réponses pleine, message %s refusé", message_id)
+        return False
+    key = (parsed.phone_number_id, parsed.sender)
+    backlog = reply_backlogs.get(key)
+    if backlog is None:
+        backlog = reply_backlogs[key] = deque()
+        reply_queue.put_nowait(key)
+    backlog.append((restaurant, parsed.sender, parsed.name, parsed.text, message_id))
+    pending_replies += 1
+    seen_message_ids[message_id] = None
+    if len(seen_message_ids) > SEEN_MESSAGE_IDS_MAX:
+        seen_message_ids.popitem(last=False)
+    return True
+
+
+async def reply_worker():
+    """Answer one message, then send the customer to the back of the line if more are waiting."""
+    global pending_replies
+    while True:
+        key = await reply_queue.get()
+        backlog = reply_backlogs[key]
+        try:
+            await handle_incoming_message(*backlog.popleft())
+        except Exception:
+            logger.exception("Reply worker error")
+        finally:
+            pending_replies -= 1
+            if backlog:
+                reply_queue.put_nowait(key)
+            else:
+                del reply_backlogs[key]
+            reply_queue.task_done()
 
 
 # ==============================================================
 # DASHBOARD HTML
 # ==============================================================
 
+# Styles for pages that are not on screen at first paint; served as a separate,
+# non-render-blocking stylesheet (see DASHBOARD_CSS_ASSET)
+DASHBOARD_DEFERRED_CSS = """
+/* Conversations */
+.conv-list-item{display:flex;align-items:center;gap:12px;padding:14px 16px;border-bottom:1px solid #F1F5F9;cursor:pointer;transition:background .15s}
+.conv-list-item:hover{background:#F8FAFC}
+.conv-list-item.selected{background:rgba(0,212,170,.06);border-left:3px solid #00D4AA}
+.conv-avatar{width:40px;height:40px;border-radius:50%;display:flex;align-items:center;justify-content:center;font-size:15px;font-weight:700;flex-shrink:0}
+.bubble{max-width:75%;padding:10px 14px;border-radius:14px;font-size:13px;line-height:1.5;margin-bottom:8px;word-wrap:break-word}
+.bubble-user{background:#E8F5E9;color:#1B5E20;margin-left:auto;border-bottom-right-radius:4px}
+.bubble-bot{background:#F1F5F9;color:#0F1B2D;margin-right:auto;border-bottom-left-radius:4px}
+"""
+
 DASHBOARD_HTML = """<!DOCTYPE html>
 <html lang="fr">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>RestoBot Dashboard</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap" rel="stylesheet">
+<link rel="preload" href="__DEFERRED_CSS__" as="style">
+<link rel="stylesheet" href="__DEFERRED_CSS__" media="print" onload="this.media='all'">
 <style>
 *{margin:0;padding:0;box-sizing:border-box}
-body{font-family:'Inter',-apple-system,sans-serif;background:#F1F5F9;color:#0F1B2D;min-height:100vh}
+body{font-family:Inter,-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif;background:#F1F5F9;color:#0F1B2D;min-height:100vh}
 ::-webkit-scrollbar{width:5px}::-webkit-scrollbar-track{background:transparent}::-webkit-scrollbar-thumb{background:#CBD5E1;border-radius:3px}
 input::placeholder{color:#94A3B8}
 @keyframes slideUp{from{opacity:0;transform:translateY(16px)}to{opacity:1;transform:translateY(0)}}
@@ -1008,15 +1496,8 @@ input::placeholder{color:#94A3B8}
 .booking-card:hover{background:#F8FAFC}
 .booking-card.selected{background:rgba(37,99,235,.04)}
 .src-dot{width:8px;height:8px;border-radius:50%;flex-shrink:0}
-
-/* Conversations */
-.conv-list-item{display:flex;align-items:center;gap:12px;padding:14px 16px;border-bottom:1px solid #F1F5F9;cursor:pointer;transition:background .15s}
-.conv-list-item:hover{background:#F8FAFC}
-.conv-list-item.selected{background:rgba(0,212,170,.06);border-left:3px solid #00D4AA}
-.conv-avatar{width:40px;height:40px;border-radius:50%;display:flex;align-items:center;justify-content:center;font-size:15px;font-weight:700;flex-shrink:0}
-.bubble{max-width:75%;padding:10px 14px;border-radius:14px;font-size:13px;line-height:1.5;margin-bottom:8px;word-wrap:break-word}
-.bubble-user{background:#E8F5E9;color:#1B5E20;margin-left:auto;border-bottom-right-radius:4px}
-.bubble-bot{background:#F1F5F9;color:#0F1B2D;margin-right:auto;border-bottom-left-radius:4px}
+/* Rows of the non-windowed lists: skip layout/paint for the ones scrolled out of view */
+.booking-card,.list-row{content-visibility:auto;contain-intrinsic-size:auto 72px}
 
 .empty-state{text-align:center;padding:60px 20px;color:#94A3B8}
 .empty-state span{font-size:48px;display:block;margin-bottom:12px}
@@ -1062,8 +1543,8 @@ input::placeholder{color:#94A3B8}
   <h2>RestoBot</h2>
   <p class="sub">Tableau de bord restaurateur</p>
   <div class="login-error" id="loginError">Mot de passe incorrect</div>
-  <input type="password" id="loginPwd" placeholder="Mot de passe" onkeydown="if(event.key==='Enter')doLogin()">
-  <button onclick="doLogin()">Connexion</button>
+  <input type="password" id="loginPwd" placeholder="Mot de passe">
+  <button data-call="doLogin">Connexion</button>
 </div>
 </div>
 
@@ -1075,13 +1556,13 @@ input::placeholder{color:#94A3B8}
   </div>
   <div style="padding:0 12px;flex:1">
     <div style="color:#475569;font-size:10px;font-weight:700;letter-spacing:.08em;padding:0 8px;margin-bottom:8px">PRINCIPAL</div>
-    <button class="nav-item active" onclick="switchPage('floorplan',this)">🗺️ Plan de salle</button>
-    <button class="nav-item" onclick="switchPage('bookings',this)">📋 Réservations <span class="nav-badge" id="bookBadge" style="background:#F59E0B">0</span></button>
-    <button class="nav-item" onclick="switchPage('conversations',this)">💬 Conversations <span class="nav-badge" id="convBadge">0</span></button>
-    <button class="nav-item" onclick="switchPage('reviews',this)">⭐ Avis Google <span class="nav-badge" id="reviewBadge" style="background:#00D4AA">0</span></button>
-    <button class="nav-item" onclick="switchPage('contacts',this)">👥 Contacts <span class="nav-badge" id="contactBadge" style="background:#8B5CF6">0</span></button>
-    <button class="nav-item" onclick="switchPage('config',this)">⚙️ Configuration</button>
-    <button class="nav-item" onclick="switchPage('dashboard',this)">📊 Statistiques</button>
+    <button class="nav-item active" data-nav="floorplan">🗺️ Plan de salle</button>
+    <button class="nav-item" data-nav="bookings">📋 Réservations <span class="nav-badge" id="bookBadge" style="background:#F59E0B">0</span></button>
+    <button class="nav-item" data-nav="conversations">💬 Conversations <span class="nav-badge" id="convBadge">0</span></button>
+    <button class="nav-item" data-nav="reviews">⭐ Avis Google <span class="nav-badge" id="reviewBadge" style="background:#00D4AA">0</span></button>
+    <button class="nav-item" data-nav="contacts">👥 Contacts <span class="nav-badge" id="contactBadge" style="background:#8B5CF6">0</span></button>
+    <button class="nav-item" data-nav="config">⚙️ Configuration</button>
+    <button class="nav-item" data-nav="dashboard">📊 Statistiques</button>
   </div>
   <div style="padding:16px 20px;border-top:1px solid #1E293B;display:flex;align-items:center;gap:10px">
     <div style="width:32px;height:32px;border-radius:50%;background:#00D4AA;display:flex;align-items:center;justify-content:center;color:white;font-size:13px;font-weight:700">EC</div>
@@ -1108,15 +1589,15 @@ input::placeholder{color:#94A3B8}
     <div class="page active" id="page-floorplan">
       <div style="display:flex;gap:4;margin-bottom:12px;align-items:center">
         <div style="display:flex;gap:4px;background:#F1F5F9;border-radius:8px;padding:3px;margin-right:12px">
-          <button class="slot-btn" onclick="switchService('midi',this)" id="svc-midi" style="background:#0F1B2D;color:white;padding:6px 14px;border-radius:6px;border:none;font-size:12px;font-weight:700;cursor:pointer;font-family:inherit">☀️ Midi</button>
-          <button class="slot-btn" onclick="switchService('soir',this)" id="svc-soir" style="padding:6px 14px;border-radius:6px;border:none;font-size:12px;font-weight:700;cursor:pointer;font-family:inherit;background:transparent;color:#94A3B8">🌙 Soir</button>
+          <button class="slot-btn" data-service="midi" id="svc-midi" style="background:#0F1B2D;color:white;padding:6px 14px;border-radius:6px;border:none;font-size:12px;font-weight:700;cursor:pointer;font-family:inherit">☀️ Midi</button>
+          <button class="slot-btn" data-service="soir" id="svc-soir" style="padding:6px 14px;border-radius:6px;border:none;font-size:12px;font-weight:700;cursor:pointer;font-family:inherit;background:transparent;color:#94A3B8">🌙 Soir</button>
         </div>
         <div id="slotSelector" style="display:flex;gap:4px;overflow-x:auto;padding-bottom:4px;flex:1"></div>
       </div>
 
       <div id="assignBanner" class="hidden" style="background:rgba(37,99,235,.08);border:1.5px dashed #2563EB;border-radius:12px;padding:10px 16px;margin-bottom:12px;display:flex;justify-content:space-between;align-items:center">
         <span style="font-size:13px;font-weight:600;color:#2563EB">🎯 Cliquez sur une table libre pour assigner</span>
-        <button onclick="cancelAssign()" style="background:white;border:1px solid #2563EB;border-radius:6px;padding:4px 12px;font-size:11px;font-weight:600;color:#2563EB;cursor:pointer;font-family:inherit">Annuler</button>
+        <button data-call="cancelAssign" style="background:white;border:1px solid #2563EB;border-radius:6px;padding:4px 12px;font-size:11px;font-weight:600;color:#2563EB;cursor:pointer;font-family:inherit">Annuler</button>
       </div>
 
       <div style="display:flex;gap:12px;margin-bottom:16px" id="fpSummary"></div>
@@ -1139,7 +1620,7 @@ input::placeholder{color:#94A3B8}
 
         <div style="background:white;border-left:1px solid #E2E8F0;border-radius:0 14px 14px 0;overflow-y:auto;max-height:520px;box-shadow:0 1px 3px rgba(0,0,0,.04)">
           <div style="padding:16px 20px;border-bottom:1px solid #E2E8F0">
-            <div style="display:flex;justify-content:space-between;align-items:center"><div style="font-size:15px;font-weight:700;color:#0F1B2D" id="fpPanelTitle">Reservations</div><button onclick="showAddBooking()" style="background:#00D4AA;color:white;border:none;border-radius:8px;padding:6px 12px;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">+ Nouvelle</button></div>
+            <div style="display:flex;justify-content:space-between;align-items:center"><div style="font-size:15px;font-weight:700;color:#0F1B2D" id="fpPanelTitle">Reservations</div><button data-call="showAddBooking" style="background:#00D4AA;color:white;border:none;border-radius:8px;padding:6px 12px;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">+ Nouvelle</button></div>
             <div style="font-size:12px;color:#94A3B8" id="fpPanelSub"></div>
           </div>
           <div id="fpBookingList"></div>
@@ -1151,7 +1632,7 @@ input::placeholder{color:#94A3B8}
     <div class="page" id="page-bookings">
       <div class="card" style="padding:0;overflow:hidden">
         <div style="padding:20px 24px;border-bottom:1px solid #E2E8F0"><div class="card-title">Toutes les reservations</div><div class="card-sub">WhatsApp + Zenchef</div></div>
-        <div id="allBookingsList"></div>
+        <div id="allBookingsList" style="height:calc(100vh - 210px);overflow-y:auto"></div>
       </div>
     </div>
 
@@ -1245,7 +1726,7 @@ input::placeholder{color:#94A3B8}
           <div id="cfgPages" style="display:grid;grid-template-columns:1fr 1fr;gap:8px"></div>
         </div>
 
-        <button onclick="saveConfig()" style="width:100%;padding:14px;border-radius:12px;border:none;background:#00D4AA;color:white;font-size:15px;font-weight:700;cursor:pointer;font-family:inherit;margin-bottom:16px">💾 Enregistrer les modifications</button>
+        <button data-call="saveConfig" style="width:100%;padding:14px;border-radius:12px;border:none;background:#00D4AA;color:white;font-size:15px;font-weight:700;cursor:pointer;font-family:inherit;margin-bottom:16px">💾 Enregistrer les modifications</button>
         <div style="background:rgba(37,99,235,.06);border:1px solid rgba(37,99,235,.15);border-radius:12px;padding:16px">
           <div style="font-size:13px;font-weight:600;color:#2563EB;margin-bottom:6px">💡 Mise a jour instantanee</div>
           <div style="font-size:12px;color:#64748B;line-height:1.6">Les modifications sont appliquees immediatement. L'agent IA utilisera les nouvelles infos des le prochain message client.</div>
@@ -1270,10 +1751,10 @@ input::placeholder{color:#94A3B8}
         <div class="card" style="padding:24px">
           <div class="card-title">Controle rapide</div>
           <div class="ctrl-grid" style="margin-top:16px">
-            <button class="ctrl-btn on" id="btn-open" onclick="setStatus('open')">🟢 Ouvert</button>
-            <button class="ctrl-btn" id="btn-full_tonight" onclick="setStatus('full_tonight')">🔴 Complet soir</button>
-            <button class="ctrl-btn" id="btn-full_lunch" onclick="setStatus('full_lunch')">🟠 Complet midi</button>
-            <button class="ctrl-btn" id="btn-closed_today" onclick="setStatus('closed_today')">⛔ Ferme</button>
+            <button class="ctrl-btn on" id="btn-open" data-status="open">🟢 Ouvert</button>
+            <button class="ctrl-btn" id="btn-full_tonight" data-status="full_tonight">🔴 Complet soir</button>
+            <button class="ctrl-btn" id="btn-full_lunch" data-status="full_lunch">🟠 Complet midi</button>
+            <button class="ctrl-btn" id="btn-closed_today" data-status="closed_today">⛔ Ferme</button>
           </div>
           <div class="stat-label">LANGUES</div>
           <div id="langRow" style="display:flex;gap:8px"></div>
@@ -1288,13 +1769,13 @@ input::placeholder{color:#94A3B8}
 
 <div class="mobile-nav" id="mobileNav">
   <div class="mobile-nav-items">
-    <button class="mobile-nav-btn active" onclick="switchPage('floorplan',null);setMobileActive(this)"><span>🗺️</span>Plan</button>
-    <button class="mobile-nav-btn" onclick="switchPage('bookings',null);setMobileActive(this)"><span>📋</span>Resas</button>
-    <button class="mobile-nav-btn" onclick="switchPage('conversations',null);setMobileActive(this)"><span>💬</span>Chat</button>
-    <button class="mobile-nav-btn" onclick="switchPage('reviews',null);setMobileActive(this)"><span>⭐</span>Avis</button>
-    <button class="mobile-nav-btn" onclick="switchPage('contacts',null);setMobileActive(this)"><span>👥</span>CRM</button>
-    <button class="mobile-nav-btn" onclick="switchPage('config',null);setMobileActive(this)"><span>⚙️</span>Config</button>
-    <button class="mobile-nav-btn" onclick="switchPage('dashboard',null);setMobileActive(this)"><span>📊</span>Stats</button>
+    <button class="mobile-nav-btn active" data-nav="floorplan"><span>🗺️</span>Plan</button>
+    <button class="mobile-nav-btn" data-nav="bookings"><span>📋</span>Resas</button>
+    <button class="mobile-nav-btn" data-nav="conversations"><span>💬</span>Chat</button>
+    <button class="mobile-nav-btn" data-nav="reviews"><span>⭐</span>Avis</button>
+    <button class="mobile-nav-btn" data-nav="contacts"><span>👥</span>CRM</button>
+    <button class="mobile-nav-btn" data-nav="config"><span>⚙️</span>Config</button>
+    <button class="mobile-nav-btn" data-nav="dashboard"><span>📊</span>Stats</button>
   </div>
 </div>
 
@@ -1303,7 +1784,7 @@ input::placeholder{color:#94A3B8}
   <div style="background:white;border-radius:20px;padding:32px;width:420px;box-shadow:0 24px 80px rgba(0,0,0,.2)">
     <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:20px">
       <h2 style="font-size:18px;font-weight:800;color:#0F1B2D">Nouvelle reservation</h2>
-      <button onclick="hideAddBooking()" style="background:none;border:none;font-size:20px;cursor:pointer;color:#94A3B8">✕</button>
+      <button data-call="hideAddBooking" style="background:none;border:none;font-size:20px;cursor:pointer;color:#94A3B8">✕</button>
     </div>
     <div class="stat-label">NOM</div>
     <input class="msg-input" type="text" id="nb-name" placeholder="Nom du client" style="margin-bottom:10px">
@@ -1325,22 +1806,84 @@ input::placeholder{color:#94A3B8}
     </div>
     <div class="stat-label">NOTES</div>
     <input class="msg-input" type="text" id="nb-notes" placeholder="Allergie, occasion speciale..." style="margin-bottom:16px">
-    <button onclick="submitManualBooking()" style="width:100%;padding:13px;border-radius:10px;border:none;background:#00D4AA;color:white;font-size:14px;font-weight:700;cursor:pointer;font-family:inherit">✅ Confirmer la reservation</button>
+    <button data-call="submitManualBooking" style="width:100%;padding:13px;border-radius:10px;border:none;background:#00D4AA;color:white;font-size:14px;font-weight:700;cursor:pointer;font-family:inherit">✅ Confirmer la reservation</button>
   </div>
 </div>
 
 <div class="toast" id="toast"></div>
 
+<!-- Row templates: cloned and filled with textContent instead of re-parsing HTML strings -->
+<template id="tpl-conv"><div class="conv-list-item"><div class="conv-avatar"></div><div style="flex:1;min-width:0"><div class="conv-phone" style="font-size:13px;font-weight:600;color:#0F1B2D"></div><div class="conv-last" style="font-size:12px;color:#94A3B8;white-space:nowrap;overflow:hidden;text-overflow:ellipsis"></div></div><div class="conv-time" style="font-size:11px;color:#94A3B8;font-family:monospace"></div></div></template>
+<template id="tpl-bubble"><div style="display:flex;flex-direction:column"><div class="bubble"></div><div class="bubble-time" style="font-size:10px;color:#94A3B8;margin-bottom:6px"></div></div></template>
+<template id="tpl-lang"><div style="flex:1;background:#F8FAFC;border-radius:10px;padding:12px;text-align:center;border:1px solid #E2E8F0"><div class="lang-flag" style="font-size:20px;margin-bottom:4px"></div><div class="lang-pct" style="font-size:18px;font-weight:800;color:#0F1B2D"></div></div></template>
+<template id="tpl-booking"><div style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="src-dot"></div><div style="flex:1;min-width:0"><div class="bk-name" style="font-size:14px;font-weight:600;color:#0F1B2D"></div><div class="bk-info" style="font-size:11px;color:#94A3B8"></div><div class="bk-msg" style="font-size:11px;color:#64748B;margin-top:2px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis"></div></div><div style="text-align:right"><div class="bk-table" style="font-size:11px;font-weight:700;padding:3px 8px;border-radius:6px"></div><div class="bk-ts" style="font-size:10px;color:#94A3B8;margin-top:4px;font-family:monospace"></div></div></div></template>
+
 <script>
-const BASE=window.location.origin,SECRET='{{SECRET_KEY}}',PWD='{{DASHBOARD_PASSWORD}}';
+const BASE=window.location.origin;
 const COLORS=['#2563EB','#00D4AA','#8B5CF6','#F59E0B','#EF4444'];
+// For the few lists still built as HTML strings: customer-provided text must never become markup
+const ESC={'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'};
+// GET with If-None-Match: resolves to null when the data has not changed since the last call (304)
+const etags={};
+async function fetchFresh(path){
+  const r=await fetch(BASE+path,{cache:'no-store',headers:etags[path]?{'If-None-Match':etags[path]}:{}});
+  if(r.status===403){authLost();return null;}
+  if(r.status===304)return null;
+  etags[path]=r.headers.get('ETag');
+  return r.json();
+}
+function esc(v){return String(v??'').replace(/[&<>"']/g,c=>ESC[c]);}
+const TPL_CONV=document.getElementById('tpl-conv').content.firstElementChild;
+const TPL_BUBBLE=document.getElementById('tpl-bubble').content.firstElementChild;
+const TPL_LANG=document.getElementById('tpl-lang').content.firstElementChild;
+const TPL_BOOKING=document.getElementById('tpl-booking').content.firstElementChild;
+// Static elements toggled on every click or update, looked up once
+const PAGES=Array.from(document.querySelectorAll('.page'));
+const NAV=Array.from(document.querySelectorAll('.nav-item'));
+const MOBILE_NAV=Array.from(document.querySelectorAll('.mobile-nav-btn'));
+const CTRL=Array.from(document.querySelectorAll('.ctrl-btn'));
+function showStatus(st){CTRL.forEach(b=>b.classList.toggle('on',b.id==='btn-'+st));}
+
+// Windowed list: only the rows in view (plus a small margin) exist in the DOM,
+// a fixed pool of template clones is repositioned and refilled on scroll.
+function virtualList(el,rowH,tpl,fill,empty){
+  const inner=document.createElement('div');inner.style.position='relative';
+  const pool=[];let items=[],queued=false;
+  function draw(){
+    if(!items.length)return;
+    const start=Math.max(0,Math.floor(el.scrollTop/rowH)-2);
+    const end=Math.min(items.length,start+Math.ceil((el.clientHeight||window.innerHeight)/rowH)+5);
+    while(pool.length<end-start){
+      const n=tpl.cloneNode(true);
+      n.style.position='absolute';n.style.left='0';n.style.right='0';n.style.top='0';n.style.height=rowH+'px';n.style.boxSizing='border-box';
+      inner.appendChild(n);pool.push(n);
+    }
+    while(pool.length>end-start)pool.pop().remove();
+    pool.forEach((n,k)=>{n.style.transform='translateY('+(start+k)*rowH+'px)';fill(n,items[start+k],start+k);});
+  }
+  el.addEventListener('scroll',()=>{if(!queued){queued=true;requestAnimationFrame(()=>{queued=false;draw();});}});
+  return{
+    set(list){
+      items=list;
+      if(!items.length){el.replaceChildren(empty.cloneNode(true));return;}
+      inner.style.height=items.length*rowH+'px';
+      if(inner.parentNode!==el)el.replaceChildren(inner);
+      draw();
+    },
+    draw,
+  };
+}
+function emptyState(icon,text){const d=document.createElement('div');d.className='empty-state';const s=document.createElement('span');s.textContent=icon;d.append(s,text);return d;}
 const FLAGS={fr:'🇫🇷',en:'🇬🇧',it:'🇮🇹'};
 const MIDI=['12:00','12:15','12:30','12:45','13:00','13:15','13:30','13:45','14:00','14:15'];
 const SOIR=['19:00','19:15','19:30','19:45','20:00','20:15','20:30','20:45','21:00','21:15','21:30','21:45','22:00','22:15','22:30'];
-let curService='midi',curSlot='12:30',fpData=null,allConvs=[],assignBookingId=null;
+let curService='midi',curSlot='12:30',fpData=null,allConvs=[],curConv=null,assignBookingId=null;
 
-function doLogin(){if(document.getElementById('loginPwd').value===PWD){document.getElementById('loginOverlay').classList.add('hidden');document.getElementById('app').classList.remove('hidden');sessionStorage.setItem('rb_auth','1');loadAll();}else document.getElementById('loginError').style.display='block';}
-if(sessionStorage.getItem('rb_auth')==='1'){document.getElementById('loginOverlay').classList.add('hidden');document.getElementById('app').classList.remove('hidden');}
+async function doLogin(){const r=await fetch(BASE+'/api/login',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({password:document.getElementById('loginPwd').value})});if(r.ok){document.getElementById('loginOverlay').classList.add('hidden');document.getElementById('app').classList.remove('hidden');sessionStorage.setItem('rb_auth','1');authed=true;loadAll();}else document.getElementById('loginError').style.display='block';}
+function authLost(){sessionStorage.removeItem('rb_auth');authed=false;stopStream();document.getElementById('app').classList.add('hidden');document.getElementById('loginOverlay').classList.remove('hidden');}
+// Read storage once; doLogin/authLost keep the flag in sync
+let authed=sessionStorage.getItem('rb_auth')==='1';
+if(authed){document.getElementById('loginOverlay').classList.add('hidden');document.getElementById('app').classList.remove('hidden');}
 
 const titles={floorplan:"Plan de salle",bookings:"Reservations",conversations:"Conversations",reviews:"Avis Google",contacts:"Contacts",config:"Configuration",dashboard:"Statistiques"};
 
@@ -1349,7 +1892,7 @@ function hideAddBooking(){document.getElementById('addBookingModal').classList.a
 async function submitManualBooking(){
   var d={name:document.getElementById('nb-name').value,phone:document.getElementById('nb-phone').value,time:document.getElementById('nb-time').value,covers:document.getElementById('nb-covers').value,source:document.getElementById('nb-source').value,zone:document.getElementById('nb-zone').value,notes:document.getElementById('nb-notes').value};
   if(!d.name||!d.time){showToast('Nom et heure requis');return;}
-  var r=await fetch(BASE+'/api/bookings/add?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(d)});
+  var r=await fetch(BASE+'/api/bookings/add',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(d)});
   var j=await r.json();
   hideAddBooking();showToast('✅ Resa confirmee'+(j.table?' → '+j.table:''));
   document.getElementById('nb-name').value='';document.getElementById('nb-phone').value='';document.getElementById('nb-time').value='';document.getElementById('nb-notes').value='';document.getElementById('nb-covers').value='2';
@@ -1357,7 +1900,7 @@ async function submitManualBooking(){
 }
 
 async function fetchConfig(){
-  try{var r=await fetch(BASE+'/api/config?key='+SECRET);if(r.status===403)return;var d=await r.json();
+  try{var r=await fetch(BASE+'/api/config');if(r.status===403)return authLost();var d=await r.json();
   document.getElementById('cfg-name').value=d.name||'';
   document.getElementById('cfg-address').value=d.address||'';
   document.getElementById('cfg-phone').value=d.phone||'';
@@ -1369,7 +1912,7 @@ async function fetchConfig(){
   document.getElementById('cfg-menu').value=d.menu||'';
   document.getElementById('cfg-allergens').value=d.allergens_policy||'';
   }catch(e){console.error(e);}
-  try{var r2=await fetch(BASE+'/api/settings?key='+SECRET);if(r2.status===403)return;var s=await r2.json();
+  try{var r2=await fetch(BASE+'/api/settings');if(r2.status===403)return authLost();var s=await r2.json();
   var pages=s.pages||{};var el=document.getElementById('cfgPages');
   var items=[['floorplan','🗺️ Plan de salle'],['bookings','📋 Reservations'],['conversations','💬 Conversations'],['reviews','⭐ Avis Google'],['contacts','👥 Contacts'],['dashboard','📊 Statistiques']];
   el.innerHTML=items.map(function(p){var on=pages[p[0]]!==false;return '<label style="display:flex;align-items:center;gap:10px;padding:10px;background:'+(on?'rgba(0,212,170,.06)':'#F8FAFC')+';border-radius:8px;cursor:pointer;border:1.5px solid '+(on?'rgba(0,212,170,.3)':'#E2E8F0')+'"><input type="checkbox" data-page="'+p[0]+'" '+(on?'checked':'')+' style="width:16px;height:16px;accent-color:#00D4AA"> <span style="font-size:13px;font-weight:600;color:#0F1B2D">'+p[1]+'</span></label>';}).join('');
@@ -1378,16 +1921,24 @@ async function fetchConfig(){
 
 async function saveConfig(){
   var d={name:document.getElementById('cfg-name').value,address:document.getElementById('cfg-address').value,phone:document.getElementById('cfg-phone').value,hours:document.getElementById('cfg-hours').value,description:document.getElementById('cfg-description').value,tone:document.getElementById('cfg-tone').value,languages:document.getElementById('cfg-languages').value,special_info:document.getElementById('cfg-special').value,menu:document.getElementById('cfg-menu').value,allergens_policy:document.getElementById('cfg-allergens').value};
-  await fetch(BASE+'/api/config?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(d)});
+  await fetch(BASE+'/api/config',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(d)});
   var pages={};document.querySelectorAll('#cfgPages input[type=checkbox]').forEach(function(cb){pages[cb.dataset.page]=cb.checked;});
-  await fetch(BASE+'/api/settings?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({pages:pages})});
+  await fetch(BASE+'/api/settings',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({pages:pages})});
   showToast('💾 Configuration enregistree');
 }
 
-function switchPage(id,btn){document.querySelectorAll('.page').forEach(p=>p.classList.remove('active'));document.getElementById('page-'+id).classList.add('active');document.querySelectorAll('.nav-item').forEach(b=>b.classList.remove('active'));if(btn)btn.classList.add('active');document.getElementById('pageTitle').textContent=titles[id]||id;if(id==='conversations')fetchConversations();if(id==='reviews')fetchReviews();if(id==='contacts')fetchContacts();if(id==='config')fetchConfig();}
+function switchPage(id,btn){PAGES.forEach(p=>p.classList.toggle('active',p.id==='page-'+id));NAV.forEach(b=>b.classList.toggle('active',b===btn));document.getElementById('pageTitle').textContent=titles[id]||id;if(id==='conversations')fetchConversations();if(id==='bookings')bookingList.draw();if(id==='reviews')fetchReviews();if(id==='contacts')fetchContacts();if(id==='config')fetchConfig();}
 
 function showToast(m){const t=document.getElementById('toast');t.textContent=m;t.style.display='block';setTimeout(()=>t.style.display='none',2500);}
-function updateClock(){const n=new Date();document.getElementById('currentTime').textContent=n.toLocaleTimeString('fr-FR',{hour:'2-digit',minute:'2-digit'});document.getElementById('currentDate').textContent=n.toLocaleDateString('fr-FR',{weekday:'long',day:'numeric',month:'long',year:'numeric'});}
+const FMT_TIME=new Intl.DateTimeFormat('fr-FR',{hour:'2-digit',minute:'2-digit'});
+const FMT_DATE=new Intl.DateTimeFormat('fr-FR',{weekday:'long',day:'numeric',month:'long',year:'numeric'});
+const clockTime=document.getElementById('currentTime'),clockDate=document.getElementById('currentDate');
+let clockMinute=-1,clockDay=-1;
+function updateClock(){
+  const n=new Date(),m=n.getMinutes(),d=n.getDate();
+  if(m!==clockMinute){clockMinute=m;clockTime.textContent=FMT_TIME.format(n);}
+  if(d!==clockDay){clockDay=d;clockDate.textContent=FMT_DATE.format(n);}
+}
 setInterval(updateClock,1000);updateClock();
 
 function switchService(svc,btn){curService=svc;curSlot=(svc==='midi'?MIDI:SOIR)[2];document.getElementById('svc-midi').style.background=svc==='midi'?'#0F1B2D':'transparent';document.getElementById('svc-midi').style.color=svc==='midi'?'white':'#94A3B8';document.getElementById('svc-soir').style.background=svc==='soir'?'#0F1B2D':'transparent';document.getElementById('svc-soir').style.color=svc==='soir'?'white':'#94A3B8';renderFloorplan();}
@@ -1428,7 +1979,7 @@ function renderFloorplan(){
     const nameColor=booking?srcColor:'#94A3B8';
     tables_html+='<div class="'+cls+'" style="left:'+t.x+'%;top:'+t.y+'%;width:'+w+'px;height:'+h+'px;border-radius:'+br+';'+(booking?'border-color:'+srcColor+'60;background:'+srcColor+'10':'')+'" data-tid="'+t.id+'" >';
     tables_html+='<div class="fp-tid" style="color:'+nameColor+'">'+t.id+'</div>';
-    if(booking)tables_html+='<div class="fp-tsub" style="color:'+srcColor+'">'+booking.name.split(' ')[0]+'</div>';
+    if(booking)tables_html+='<div class="fp-tsub" style="color:'+srcColor+'">'+esc(booking.name.split(' ')[0])+'</div>';
     else tables_html+='<div class="fp-tsub" style="color:#CBD5E1">'+t.seats+'p</div>';
     tables_html+='</div>';
   });
@@ -1455,7 +2006,7 @@ function renderFloorplan(){
   bl.innerHTML=bookings.map(b=>{
     const srcC={whatsapp:'#25D366',zenchef:'#FF6B35',phone:'#94A3B8'}[b.source]||'#94A3B8';
     const srcL={whatsapp:'WhatsApp',zenchef:'Zenchef',phone:'Tel'}[b.source]||b.source;
-    return '<div class="booking-card" id="bk-'+b.id+'"><div style="display:flex;justify-content:space-between;align-items:center"><div style="display:flex;align-items:center;gap:10px"><div class="src-dot" style="background:'+srcC+'"></div><div><div style="font-size:14px;font-weight:700;color:#0F1B2D">'+b.name+'</div><div style="font-size:11px;color:#94A3B8">'+(b.covers||2)+' pers. · '+b.time+' · <span style="color:'+srcC+'">'+srcL+'</span></div></div></div><div>'+(b.table?'<span style="font-size:11px;font-weight:700;color:#00D4AA;background:rgba(0,212,170,.1);padding:3px 8px;border-radius:6px">'+b.table+'</span>':'<span style="font-size:11px;font-weight:700;color:#F59E0B;background:rgba(245,158,11,.1);padding:3px 8px;border-radius:6px">Sans table</span>')+'</div></div>'+(b.notes?'<div style="font-size:11px;color:#64748B;margin-top:6px;font-style:italic">📝 '+b.notes+'</div>':'')+'<div style="margin-top:8px;display:flex;gap:6px">'+(b.table?'<button data-action="change" data-bid="'+b.id+'"  style="padding:5px 10px;border-radius:8px;border:1px solid #2563EB;background:white;color:#2563EB;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">🔄 Changer</button><button data-action="release" data-bid="'+b.id+'" style="padding:5px 10px;border-radius:8px;border:1px solid #E2E8F0;background:white;color:#64748B;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">✕ Liberer</button>':'<button data-action="assign" data-bid="'+b.id+'" style="padding:5px 10px;border-radius:8px;border:none;background:#2563EB;color:white;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">🎯 Assigner</button>')+'</div></div>';
+    return '<div class="booking-card" id="bk-'+b.id+'"><div style="display:flex;justify-content:space-between;align-items:center"><div style="display:flex;align-items:center;gap:10px"><div class="src-dot" style="background:'+srcC+'"></div><div><div style="font-size:14px;font-weight:700;color:#0F1B2D">'+esc(b.name)+'</div><div style="font-size:11px;color:#94A3B8">'+(b.covers||2)+' pers. · '+esc(b.time)+' · <span style="color:'+srcC+'">'+esc(srcL)+'</span></div></div></div><div>'+(b.table?'<span style="font-size:11px;font-weight:700;color:#00D4AA;background:rgba(0,212,170,.1);padding:3px 8px;border-radius:6px">'+esc(b.table)+'</span>':'<span style="font-size:11px;font-weight:700;color:#F59E0B;background:rgba(245,158,11,.1);padding:3px 8px;border-radius:6px">Sans table</span>')+'</div></div>'+(b.notes?'<div style="font-size:11px;color:#64748B;margin-top:6px;font-style:italic">📝 '+esc(b.notes)+'</div>':'')+'<div style="margin-top:8px;display:flex;gap:6px">'+(b.table?'<button data-action="change" data-bid="'+b.id+'"  style="padding:5px 10px;border-radius:8px;border:1px solid #2563EB;background:white;color:#2563EB;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">🔄 Changer</button><button data-action="release" data-bid="'+b.id+'" style="padding:5px 10px;border-radius:8px;border:1px solid #E2E8F0;background:white;color:#64748B;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">✕ Liberer</button>':'<button data-action="assign" data-bid="'+b.id+'" style="padding:5px 10px;border-radius:8px;border:none;background:#2563EB;color:white;font-size:11px;font-weight:700;cursor:pointer;font-family:inherit">🎯 Assigner</button>')+'</div></div>';
   }).join('');
 }
 
@@ -1465,51 +2016,101 @@ function onTableClick(tid){
   if(!b)return;
   const t=(fpData.tables||[]).find(x=>x.id===tid);
   if(t&&b.covers>t.seats){showToast('⚠️ Table '+tid+' ('+t.seats+'p) trop petite pour '+b.covers+' couverts');return;}
-  fetch(BASE+'/api/floorplan/assign?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:b.id,table_id:tid,slot_time:curSlot})}).then(()=>{assignBookingId=null;document.getElementById('assignBanner').classList.add('hidden');showToast('✅ '+b.name+' → '+tid);fetchFloorplan();});
+  fetch(BASE+'/api/floorplan/assign',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:b.id,table_id:tid,slot_time:curSlot})}).then(()=>{assignBookingId=null;document.getElementById('assignBanner').classList.add('hidden');showToast('✅ '+b.name+' → '+tid);fetchFloorplan();});
 }
 function startAssign(bid,change){
-  if(change){fetch(BASE+'/api/floorplan/release?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:bid})}).then(()=>{assignBookingId=bid;document.getElementById('assignBanner').classList.remove('hidden');fetchFloorplan();});return;}
+  if(change){fetch(BASE+'/api/floorplan/release',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:bid})}).then(()=>{assignBookingId=bid;document.getElementById('assignBanner').classList.remove('hidden');fetchFloorplan();});return;}
   assignBookingId=bid;document.getElementById('assignBanner').classList.remove('hidden');renderFloorplan();
 }
 function cancelAssign(){assignBookingId=null;document.getElementById('assignBanner').classList.add('hidden');renderFloorplan();}
-function releaseT(bid){fetch(BASE+'/api/floorplan/release?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:bid})}).then(()=>{showToast('Table liberee');fetchFloorplan();});}
+function releaseT(bid){fetch(BASE+'/api/floorplan/release',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({booking_id:bid})}).then(()=>{showToast('Table liberee');fetchFloorplan();});}
 
 async function fetchFloorplan(){
-  try{const r=await fetch(BASE+'/api/floorplan?key='+SECRET);if(r.status===403)return;fpData=await r.json();
+  try{const r=await fetch(BASE+'/api/floorplan');if(r.status===403)return authLost();fpData=await r.json();
   const unassigned=(fpData.bookings||[]).filter(b=>b.time&&!b.table).length;
   document.getElementById('bookBadge').textContent=unassigned||'0';
   renderFloorplan();}catch(e){console.error(e);}
 }
 
-async function fetchDashboard(){
-  try{const r=await fetch(BASE+'/api/dashboard?key='+SECRET);if(r.status===403)return;const d=await r.json();
+function applyDashboard(d){
   document.getElementById('msgCount').textContent=d.stats.messages_today||0;
   document.getElementById('bookCount').textContent=d.stats.bookings_today||0;
   document.getElementById('convCount').textContent=d.conversations_count||0;
   document.getElementById('timeSaved').textContent=Math.max(1,Math.round((d.stats.messages_today||0)*1.5/60))+'h';
   document.getElementById('convBadge').textContent=d.conversations_count||0;
-  const st=d.status.status||'open';
-  document.querySelectorAll('.ctrl-btn').forEach(b=>b.className='ctrl-btn');
-  const a=document.getElementById('btn-'+st);if(a)a.classList.add('on');
-  const langs=d.stats.languages||{};const total=Object.values(langs).reduce((a,b)=>a+b,0)||1;
-  document.getElementById('langRow').innerHTML=Object.entries(langs).map(([l,c])=>'<div style="flex:1;background:#F8FAFC;border-radius:10px;padding:12px;text-align:center;border:1px solid #E2E8F0"><div style="font-size:20px;margin-bottom:4px">'+(FLAGS[l]||'🌍')+'</div><div style="font-size:18px;font-weight:800;color:#0F1B2D">'+Math.round(c/total*100)+'%</div></div>').join('');
+  showStatus(d.status.status||'open');
+  const langs=d.stats.languages||{};let total=0;for(const l in langs)total+=langs[l];if(!total)total=1;
+  const frag=document.createDocumentFragment();
+  for(const [l,c] of Object.entries(langs)){
+    const n=TPL_LANG.cloneNode(true);
+    n.querySelector('.lang-flag').textContent=FLAGS[l]||'🌍';
+    n.querySelector('.lang-pct').textContent=Math.round(c/total*100)+'%';
+    frag.appendChild(n);
+  }
+  document.getElementById('langRow').replaceChildren(frag);
   const w=d.stats.messages_week||[0,0,0,0,0,0,d.stats.messages_today||0];drawChart(w);
-  }catch(e){console.error(e);}
 }
 
-function drawChart(data){const svg=document.getElementById('chartSvg');if(!data||!data.length)return;const max=Math.max(...data,1);const pts=data.map((v,i)=>({x:(i/(data.length-1))*100,y:100-(v/max)*80-5}));const line=pts.map((p,i)=>(i===0?'M':'L')+' '+p.x+' '+p.y).join(' ');svg.innerHTML='<defs><linearGradient id="cg" x1="0" y1="0" x2="0" y2="1"><stop offset="0%" stop-color="#2563EB" stop-opacity="0.25"/><stop offset="100%" stop-color="#2563EB" stop-opacity="0.03"/></linearGradient></defs><path d="'+line+' L 100 100 L 0 100 Z" fill="url(#cg)"/><path d="'+line+'" fill="none" stroke="#2563EB" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round" vector-effect="non-scaling-stroke"/>'+pts.map(p=>'<circle cx="'+p.x+'" cy="'+p.y+'" r="4" fill="white" stroke="#2563EB" stroke-width="2.5" vector-effect="non-scaling-stroke"/>').join('');}
+let chartSig='',chartArea=null,chartLine=null,chartDots=[];
+function drawChart(data){
+  if(!data||!data.length)return;
+  const sig=data.join(',');if(sig===chartSig)return;chartSig=sig;
+  const svg=document.getElementById('chartSvg');
+  if(!chartArea){
+    svg.innerHTML='<defs><linearGradient id="cg" x1="0" y1="0" x2="0" y2="1"><stop offset="0%" stop-color="#2563EB" stop-opacity="0.25"/><stop offset="100%" stop-color="#2563EB" stop-opacity="0.03"/></linearGradient></defs><path fill="url(#cg)"/><path fill="none" stroke="#2563EB" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round" vector-effect="non-scaling-stroke"/>';
+    [chartArea,chartLine]=svg.querySelectorAll('path');
+  }
+  let max=1;for(const v of data)if(v>max)max=v;
+  while(chartDots.length<data.length){
+    const c=document.createElementNS('http://www.w3.org/2000/svg','circle');
+    c.setAttribute('r','4');c.setAttribute('fill','white');c.setAttribute('stroke','#2563EB');c.setAttribute('stroke-width','2.5');c.setAttribute('vector-effect','non-scaling-stroke');
+    svg.appendChild(c);chartDots.push(c);
+  }
+  while(chartDots.length>data.length)chartDots.pop().remove();
+  let line='';
+  for(let i=0;i<data.length;i++){
+    const x=(i/(data.length-1))*100,y=100-(data[i]/max)*80-5;
+    line+=(i?' L ':'M ')+x+' '+y;
+    chartDots[i].setAttribute('cx',x);chartDots[i].setAttribute('cy',y);
+  }
+  chartLine.setAttribute('d',line);chartArea.setAttribute('d',line+' L 100 100 L 0 100 Z');
+}
 
 async function fetchConversations(){
-  try{const r=await fetch(BASE+'/api/conversations?key='+SECRET);if(r.status===403)return;const d=await r.json();allConvs=d.conversations||[];
-  const el=document.getElementById('convSidebar');
-  if(!allConvs.length){el.innerHTML='<div class="empty-state"><span>💬</span>Aucune conversation</div>';return;}
-  el.innerHTML=allConvs.map((c,i)=>'<div class="conv-list-item" onclick="openConv('+i+')" id="cv-'+i+'"><div class="conv-avatar" style="background:'+COLORS[i%5]+'15;color:'+COLORS[i%5]+'">'+(c.phone||'?')[0]+'</div><div style="flex:1;min-width:0"><div style="font-size:13px;font-weight:600;color:#0F1B2D">'+c.phone+'</div><div style="font-size:12px;color:#94A3B8;white-space:nowrap;overflow:hidden;text-overflow:ellipsis">'+c.last_message+'</div></div><div style="font-size:11px;color:#94A3B8;font-family:monospace">'+c.last_time+'</div></div>').join('');
-  }catch(e){console.error(e);}
+  try{const d=await fetchFresh('/api/conversations');if(d)applyConversations(d);}catch(e){console.error(e);}
+}
+function fillConv(n,c,i){
+  n.dataset.conv=i;
+  n.classList.toggle('selected',c.phone===curConv);
+  const av=n.querySelector('.conv-avatar');
+  av.style.background=COLORS[i%5]+'15';av.style.color=COLORS[i%5];av.textContent=(c.phone||'?')[0];
+  n.querySelector('.conv-phone').textContent=c.phone;
+  n.querySelector('.conv-last').textContent=c.last_message;
+  n.querySelector('.conv-time').textContent=c.last_time;
+}
+const convList=virtualList(document.getElementById('convSidebar'),69,TPL_CONV,fillConv,emptyState('💬','Aucune conversation'));
+function renderConvList(){convList.set(allConvs);}
+function applyConversations(d){allConvs=d.conversations||[];renderConvList();}
+// Dashboard, conversations and bookings in a single request
+async function fetchAll(){
+  try{const d=await fetchFresh('/api/all');if(!d)return;
+  applyDashboard(d.dashboard);applyConversations(d.conversations);applyBookings(d.bookings);}catch(e){console.error(e);}
+}
+function openConv(i){const c=allConvs[i];if(!c)return;curConv=c.phone;convList.draw();renderChat(c);}
+function renderChat(c){document.getElementById('chatHeader').textContent='📱 '+c.phone+' — '+c.count+' messages';const body=document.getElementById('chatBody');
+  const frag=document.createDocumentFragment();
+  for(const m of c.messages){
+    const n=TPL_BUBBLE.cloneNode(true),user=m.role==='user';
+    n.style.alignItems=user?'flex-end':'flex-start';
+    const b=n.querySelector('.bubble');b.classList.add(user?'bubble-user':'bubble-bot');b.textContent=m.content;
+    n.querySelector('.bubble-time').textContent=m.time;
+    frag.appendChild(n);
+  }
+  body.replaceChildren(frag);body.scrollTop=body.scrollHeight;
 }
-function openConv(i){const c=allConvs[i];if(!c)return;document.querySelectorAll('.conv-list-item').forEach(e=>e.classList.remove('selected'));document.getElementById('cv-'+i).classList.add('selected');document.getElementById('chatHeader').textContent='📱 '+c.phone+' — '+c.count+' messages';const body=document.getElementById('chatBody');body.innerHTML=c.messages.map(m=>'<div style="display:flex;flex-direction:column;align-items:'+(m.role==='user'?'flex-end':'flex-start')+'"><div class="bubble '+(m.role==='user'?'bubble-user':'bubble-bot')+'">'+m.content+'</div><div style="font-size:10px;color:#94A3B8;margin-bottom:6px">'+m.time+'</div></div>').join('');body.scrollTop=body.scrollHeight;}
 
 async function fetchReviews(){
-  try{const r=await fetch(BASE+'/api/reviews?key='+SECRET);if(r.status===403)return;const d=await r.json();
+  try{const r=await fetch(BASE+'/api/reviews');if(r.status===403)return authLost();const d=await r.json();
   document.getElementById('revPositive').textContent=d.stats.positive||0;
   document.getElementById('revNegative').textContent=d.stats.negative||0;
   document.getElementById('revPending').textContent=(d.stats.total||0)-(d.stats.responded||0);
@@ -1522,29 +2123,35 @@ async function fetchReviews(){
     if(r.responded&&r.sentiment==='POSITIVE'){statusBg='rgba(0,212,170,.1)';statusColor='#00D4AA';statusText='✅ Positif';}
     else if(r.responded&&r.sentiment==='NEGATIVE'){statusBg='rgba(239,68,68,.1)';statusColor='#EF4444';statusText='⚠️ Negatif';}
     else if(r.sent){statusText='📩 Envoye';}
-    return '<div style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="conv-avatar" style="background:'+statusBg+';color:'+statusColor+'">⭐</div><div style="flex:1"><div style="font-size:14px;font-weight:600;color:#0F1B2D">'+r.name+'</div><div style="font-size:11px;color:#94A3B8">'+r.phone+(r.booking_time?' · '+r.booking_time:'')+'</div>'+(r.response?'<div style="font-size:11px;color:#64748B;margin-top:4px;font-style:italic">"'+r.response+'"</div>':'')+'</div><div style="text-align:right"><span style="font-size:11px;font-weight:700;padding:3px 8px;border-radius:6px;background:'+statusBg+';color:'+statusColor+'">'+statusText+'</span></div></div>';
+    return '<div class="list-row" style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="conv-avatar" style="background:'+statusBg+';color:'+statusColor+'">⭐</div><div style="flex:1"><div style="font-size:14px;font-weight:600;color:#0F1B2D">'+esc(r.name)+'</div><div style="font-size:11px;color:#94A3B8">'+esc(r.phone)+(r.booking_time?' · '+esc(r.booking_time):'')+'</div>'+(r.response?'<div style="font-size:11px;color:#64748B;margin-top:4px;font-style:italic">"'+esc(r.response)+'"</div>':'')+'</div><div style="text-align:right"><span style="font-size:11px;font-weight:700;padding:3px 8px;border-radius:6px;background:'+statusBg+';color:'+statusColor+'">'+statusText+'</span></div></div>';
   }).join('');
   }catch(e){console.error(e);}
 }
 
+function fillBooking(n,b){
+  n.querySelector('.src-dot').style.background={whatsapp:'#25D366',zenchef:'#FF6B35',phone:'#94A3B8'}[b.source]||'#94A3B8';
+  n.querySelector('.bk-name').textContent=b.name;
+  n.querySelector('.bk-info').textContent=(b.covers||'?')+' pers. · '+(b.time||'?')+' · '+b.phone;
+  const msg=n.querySelector('.bk-msg');
+  msg.textContent=b.message?b.message.substring(0,80):'';msg.style.display=b.message?'':'none';
+  const t=n.querySelector('.bk-table');
+  if(b.table){t.textContent=b.table;t.style.color='#00D4AA';t.style.background='rgba(0,212,170,.1)';}
+  else{t.textContent='En attente';t.style.color='#F59E0B';t.style.background='rgba(245,158,11,.1)';}
+  n.querySelector('.bk-ts').textContent=(b.timestamp||'').substring(0,16).replace('T',' ');
+}
+const bookingList=virtualList(document.getElementById('allBookingsList'),80,TPL_BOOKING,fillBooking,emptyState('🍽️','Aucune reservation'));
+function applyBookings(d){bookingList.set(d.bookings||[]);}
 async function fetchAllBookings(){
-  try{const r=await fetch(BASE+'/api/bookings?key='+SECRET);if(r.status===403)return;const d=await r.json();
-  const el=document.getElementById('allBookingsList');
-  const bs=d.bookings||[];
-  if(!bs.length){el.innerHTML='<div class="empty-state"><span>🍽️</span>Aucune reservation</div>';return;}
-  el.innerHTML=bs.map(b=>{
-    const srcC={whatsapp:'#25D366',zenchef:'#FF6B35',phone:'#94A3B8'}[b.source]||'#94A3B8';
-    return '<div style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="src-dot" style="background:'+srcC+'"></div><div style="flex:1"><div style="font-size:14px;font-weight:600;color:#0F1B2D">'+b.name+'</div><div style="font-size:11px;color:#94A3B8">'+(b.covers||'?')+' pers. · '+(b.time||'?')+' · '+b.phone+'</div>'+(b.message?'<div style="font-size:11px;color:#64748B;margin-top:2px">'+b.message.substring(0,80)+'</div>':'')+'</div><div style="text-align:right">'+(b.table?'<div style="font-size:11px;font-weight:700;color:#00D4AA;background:rgba(0,212,170,.1);padding:3px 8px;border-radius:6px">'+b.table+'</div>':'<div style="font-size:11px;font-weight:700;color:#F59E0B;background:rgba(245,158,11,.1);padding:3px 8px;border-radius:6px">En attente</div>')+'<div style="font-size:10px;color:#94A3B8;margin-top:4px;font-family:monospace">'+(b.timestamp||'').substring(0,16).replace('T',' ')+'</div></div></div>';
-  }).join('');
+  try{const d=await fetchFresh('/api/bookings');if(d)applyBookings(d);
   }catch(e){console.error(e);}
 }
 
-async function setStatus(s){await fetch(BASE+'/api/status?key='+SECRET,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({status:s})});document.querySelectorAll('.ctrl-btn').forEach(b=>b.className='ctrl-btn');const a=document.getElementById('btn-'+s);if(a)a.classList.add('on');showToast('✅ Statut mis a jour');}
+async function setStatus(s){await fetch(BASE+'/api/status',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({status:s})});showStatus(s);showToast('✅ Statut mis a jour');}
 
 
 
 async function fetchContacts(){
-  try{const r=await fetch(BASE+'/api/contacts?key='+SECRET);if(r.status===403)return;const d=await r.json();
+  try{const r=await fetch(BASE+'/api/contacts');if(r.status===403)return authLost();const d=await r.json();
   const cs=d.contacts||[];
   document.getElementById('crmTotal').textContent=d.total||0;
   document.getElementById('contactBadge').textContent=d.total||0;
@@ -1554,17 +2161,33 @@ async function fetchContacts(){
   const el=document.getElementById('contactsList');
   if(!cs.length){el.innerHTML='<div class="empty-state"><span>👥</span>Aucun contact enregistre</div>';return;}
   el.innerHTML=cs.map((c,i)=>{
-    const tags=(c.tags||[]).map(t=>'<span style="display:inline-block;background:rgba(139,92,246,.1);color:#8B5CF6;padding:2px 6px;border-radius:4px;font-size:10px;font-weight:600;margin-right:4px">'+t+'</span>').join('');
-    return '<div style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="conv-avatar" style="background:'+COLORS[i%5]+'15;color:'+COLORS[i%5]+'">'+(c.name||'?')[0].toUpperCase()+'</div><div style="flex:1;min-width:0"><div style="display:flex;align-items:center;gap:8px"><span style="font-size:14px;font-weight:600;color:#0F1B2D">'+c.name+'</span>'+tags+'</div><div style="font-size:11px;color:#94A3B8">'+c.phone+' · '+(c.visits||1)+' visite(s) · '+({fr:"🇫🇷",en:"🇬🇧",it:"🇮🇹"}[c.language]||"🌍")+' '+(c.language||"")+'</div></div><div style="text-align:right"><div style="font-size:10px;color:#94A3B8;font-family:monospace">'+(c.last_seen||"").substring(0,10)+'</div></div></div>';
+    const tags=(c.tags||[]).map(t=>'<span style="display:inline-block;background:rgba(139,92,246,.1);color:#8B5CF6;padding:2px 6px;border-radius:4px;font-size:10px;font-weight:600;margin-right:4px">'+esc(t)+'</span>').join('');
+    return '<div class="list-row" style="display:flex;align-items:center;gap:12px;padding:14px 20px;border-bottom:1px solid #F1F5F9"><div class="conv-avatar" style="background:'+COLORS[i%5]+'15;color:'+COLORS[i%5]+'">'+esc((c.name||'?')[0].toUpperCase())+'</div><div style="flex:1;min-width:0"><div style="display:flex;align-items:center;gap:8px"><span style="font-size:14px;font-weight:600;color:#0F1B2D">'+esc(c.name)+'</span>'+tags+'</div><div style="font-size:11px;color:#94A3B8">'+esc(c.phone)+' · '+(c.visits||1)+' visite(s) · '+({fr:"🇫🇷",en:"🇬🇧",it:"🇮🇹"}[c.language]||"🌍")+' '+esc(c.language)+'</div></div><div style="text-align:right"><div style="font-size:10px;color:#94A3B8;font-family:monospace">'+(c.last_seen||"").substring(0,10)+'</div></div></div>';
   }).join('');
   }catch(e){console.error(e);}
 }
 
 
-// Event delegation for dynamically created elements
+// Event delegation: one listener for every button, static or rendered
+const CALLS={doLogin,cancelAssign,showAddBooking,hideAddBooking,saveConfig,submitManualBooking};
+document.getElementById('loginPwd').addEventListener('keydown',e=>{if(e.key==='Enter')doLogin();});
 document.addEventListener('click',function(e){
+  var nav=e.target.closest('[data-nav]');
+  if(nav){
+    if(nav.classList.contains('mobile-nav-btn')){switchPage(nav.dataset.nav,null);setMobileActive(nav);}
+    else switchPage(nav.dataset.nav,nav);
+    return;
+  }
+  var call=e.target.closest('[data-call]');
+  if(call){CALLS[call.dataset.call]();return;}
+  var st=e.target.closest('[data-status]');
+  if(st){setStatus(st.dataset.status);return;}
+  var svc=e.target.closest('[data-service]');
+  if(svc){switchService(svc.dataset.service,svc);return;}
   var btn=e.target.closest('[data-slot]');
   if(btn){curSlot=btn.dataset.slot;renderFloorplan();return;}
+  var cv=e.target.closest('[data-conv]');
+  if(cv){openConv(+cv.dataset.conv);return;}
   var tbl=e.target.closest('[data-tid]');
   if(tbl){onTableClick(tbl.dataset.tid);return;}
   var act=e.target.closest('[data-action]');
@@ -1576,43 +2199,209 @@ document.addEventListener('click',function(e){
   }
 });
 
-function setMobileActive(btn){document.querySelectorAll('.mobile-nav-btn').forEach(b=>b.classList.remove('active'));if(btn)btn.classList.add('active');}
-function loadAll(){fetchFloorplan();fetchDashboard();fetchAllBookings();fetchConversations();fetchReviews();fetchContacts();}
-if(sessionStorage.getItem('rb_auth')==='1')loadAll();
-setInterval(()=>{if(sessionStorage.getItem('rb_auth')==='1'){fetchFloorplan();fetchDashboard();}},15000);
+function setMobileActive(btn){MOBILE_NAV.forEach(b=>b.classList.toggle('active',b===btn));}
+// Live updates: the server pushes changes instead of the dashboard polling
+function onConvMessage(m){
+  const i=allConvs.findIndex(c=>c.phone===m.phone);
+  const c=i>=0?allConvs.splice(i,1)[0]:{phone:m.phone,messages:[]};
+  c.messages.push({role:m.role,content:m.content,time:m.time});
+  if(c.messages.length>20)c.messages.shift();
+  c.last_message=m.content.substring(0,100);c.last_time=m.time;c.count=c.messages.length;
+  allConvs.unshift(c);
+  renderConvList();
+  if(c.phone===curConv)renderChat(c);
+}
+let stream=null;
+// resync: refetch on the first open too, to catch what happened while disconnected
+function startStream(resync){
+  if(stream)return;
+  stream=new EventSource(BASE+'/api/stream');
+  let opened=!!resync;
+  stream.onopen=()=>{if(opened){fetchAll();fetchFloorplan();}opened=true;};
+  stream.addEventListener('dashboard',e=>applyDashboard(JSON.parse(e.data)));
+  stream.addEventListener('message',e=>onConvMessage(JSON.parse(e.data)));
+  stream.addEventListener('booking',()=>{fetchFloorplan();fetchAllBookings();});
+}
+function stopStream(){if(stream){stream.close();stream=null;}}
+// A background tab needs no live updates: drop the stream and catch up when it is shown again
+document.addEventListener('visibilitychange',()=>{
+  if(!authed)return;
+  if(document.hidden)stopStream();else startStream(true);
+});
+function loadAll(){fetchFloorplan();fetchAll();fetchReviews();fetchContacts();startStream();}
+if(authed)loadAll();
 </script>
 </body>
 </html>
 """
 
 
+def build_asset(body: bytes, media_type: str, cache_control: str, link: str = "") -> dict:
+    """Precompute everything needed to serve a static body: gzip bytes and ETag."""
+    return {
+        "body": body,
+        "gzip": gzip.compress(body, 9),
+        "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+        "media_type": media_type,
+        "cache_control": cache_control,
+        "link": link,
+    }
+
+
+def asset_response(request: Request, asset: dict) -> Response:
+    """Serve a prebuilt asset, honouring If-None-Match and Accept-Encoding."""
+    headers = {"ETag": asset["etag"], "Cache-Control": asset["cache_control"], "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == asset["etag"]:
+        return Response(status_code=304, headers=headers)
+    if asset["link"]:
+        # Preload hints in the headers: subresources start loading before the HTML is parsed
+        headers["Link"] = asset["link"]
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(asset["gzip"], media_type=asset["media_type"], headers=headers)
+    return Response(asset["body"], media_type=asset["media_type"], headers=headers)
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and the whitespace the hand-written stylesheets carry."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+# Deferred stylesheet: the URL carries its hash, so it can be cached forever
+DASHBOARD_CSS_ASSET = build_asset(
+    minify_css(DASHBOARD_DEFERRED_CSS).encode("utf-8"), "text/css; charset=utf-8",
+    "public, max-age=31536000, immutable",
+)
+DASHBOARD_CSS_PATH = "/static/dashboard-" + DASHBOARD_CSS_ASSET["etag"].strip('"')[:12] + ".css"
+
+# The page carries no secrets (auth is a session cookie), so it is identical for everyone:
+# compress once and let browsers revalidate with the ETag
+DASHBOARD_ASSET = build_asset(
+    re.sub(
+        r"(?s)<style>(.*?)</style>",
+        lambda m: "<style>" + minify_css(m.group(1)) + "</style>",
+        DASHBOARD_HTML.replace("__DEFERRED_CSS__", DASHBOARD_CSS_PATH),
+        count=1,
+    ).encode("utf-8"),
+    "text/html; charset=utf-8", "no-cache",
+    link=f"<{DASHBOARD_CSS_PATH}>; rel=preload; as=style",
+)
+
+
 # ==============================================================
 # FASTAPI APP
 # ==============================================================
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global db, http_client, reply_queue, owner_notifications
+    log_listener = start_log_listener()
     load_sample_restaurant()
+    db = open_db()
+    logger.info("💾 %s message(s) rechargé(s) depuis %s", load_conversations(db), DB_PATH)
     logger.info("🚀 RestoBot v4.0 démarré")
-    import asyncio
     async def review_loop():
         while True:
             try:
                 await process_review_queue()
             except Exception as e:
-                logger.error(f"Review queue error: {e}")
+                logger.error("Review queue error: %s", e)
             await asyncio.sleep(300)
-    task = asyncio.create_task(review_loop())
+    async def owner_notification_loop():
+        while True:
+            try:
+                await flush_owner_notifications()
+            except Exception as e:
+                logger.error("Owner notification error: %s", e)
+            await asyncio.sleep(OWNER_NOTIFY_INTERVAL)
+    async def retention_loop():
+        while True:
+            try:
+                removed = purge_expired_data()
+                await asyncio.to_thread(delete_expired_messages)
+                if any(removed):
+                    logger.info("🧹 Rétention : %s conversation(s), %s réservation(s) supprimée(s)", *removed)
+            except Exception as e:
+                logger.error("Retention error: %s", e)
+            await asyncio.sleep(3600)
+    owner_notifications = asyncio.Queue()
+    tasks = [
+        asyncio.create_task(review_loop()),
+        asyncio.create_task(owner_notification_loop()),
+        asyncio.create_task(retention_loop()),
+        asyncio.create_task(db_writer_loop()),
+    ]
+    reply_queue = asyncio.Queue()  # bounded through pending_replies
+    tasks += [asyncio.create_task(reply_worker()) for _ in range(REPLY_WORKERS)]
     yield
-    task.cancel()
+    try:
+        # Let queued replies go out before the workers are cancelled
+        await asyncio.wait_for(reply_queue.join(), 10)
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ %s réponse(s) non envoyée(s) à l'arrêt", pending_replies)
+    for task in tasks:
+        task.cancel()
+    # Booking alerts still waiting for the next batch go out now rather than never
+    if not owner_notifications.empty():
+        try:
+            await flush_owner_notifications()
+        except Exception as e:
+            logger.error("Owner notification error: %s", e)
+    owner_notifications = None
+    write_messages(take_pending_messages())
+    db.close()
+    db = None
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
     logger.info("👋 RestoBot arrêté")
+    stop_log_listener(log_listener)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# max_age: browsers may reuse a preflight answer for a day instead of re-asking on every call
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], max_age=86400)
+
+
+# --- Health check ---
+# Built once: Starlette responses carry no per-request state, so one instance serves every probe
+HEALTH_RESPONSE = Response(orjson.dumps({"status": "ok"}), media_type="application/json")
 
 
-app = FastAPI(lifespan=lifespan)
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+@app.get("/health")
+async def health():
+    """Load balancer probe: no allocation or serialization per hit."""
+    return HEALTH_RESPONSE
 
 
 # --- Webhook ---
+MAX_WEBHOOK_BODY = 256 * 1024  # WhatsApp payloads are a few KB
+
+
+async def read_body(request: Request) -> bytearray:
+    """Webhook body, bounded by MAX_WEBHOOK_BODY whatever Content-Length claims."""
+    header = request.headers.get("content-length")
+    if header is None:
+        body = await request.body()
+        if len(body) > MAX_WEBHOOK_BODY:
+            raise HTTPException(status_code=413)
+        return bytearray(body)
+    if not header.isdigit():
+        raise HTTPException(status_code=400)
+    if int(header) > MAX_WEBHOOK_BODY:
+        raise HTTPException(status_code=413)
+    # Grown from the bytes actually received, never allocated from the header
+    buf = bytearray()
+    async for chunk in request.stream():
+        buf += chunk
+        if len(buf) > MAX_WEBHOOK_BODY:
+            raise HTTPException(status_code=413)
+    return buf
+
+
 @app.get("/webhook/whatsapp")
 async def verify_webhook(request: Request):
     params = request.query_params
@@ -1625,28 +2414,38 @@ async def verify_webhook(request: Request):
 
 
 @app.post("/webhook/whatsapp")
-async def receive_webhook(request: Request, background_tasks: BackgroundTasks):
-    body = await request.json()
-    parsed = parse_webhook(body)
+async def receive_webhook(request: Request):
+    raw = await read_body(request)
+    # Delivery/read statuses far outnumber messages and never carry a "messages" key:
+    # answer them after one byte scan, without decoding anything
+    if b'"messages"' not in raw:
+        return {"status": "ignored"}
+    parsed = parse_webhook(orjson.loads(raw))
     if not parsed:
         return {"status": "ignored"}
-    restaurant = restaurants.get(parsed["phone_number_id"])
-    if restaurant:
-        background_tasks.add_task(
-            mark_as_read, parsed["phone_number_id"], restaurant["access_token"], parsed["message_id"]
-        )
-    background_tasks.add_task(
-        process_and_reply, parsed["phone_number_id"], parsed["from"], parsed["name"], parsed["text"]
-    )
+    if not enqueue_reply(parsed):
+        return Response(status_code=503)
     return {"status": "ok"}
 
 
 # --- Dashboard ---
+def secret_matches(given: str, expected: str) -> bool:
+    """Constant-time comparison; bytes so non-ASCII input is a mismatch, not a TypeError."""
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
 @app.get("/dashboard/{secret_key}", response_class=HTMLResponse)
-async def dashboard(secret_key: str):
-    if secret_key != DASHBOARD_SECRET:
+async def dashboard(secret_key: str, request: Request):
+    if not secret_matches(secret_key, DASHBOARD_SECRET):
         return HTMLResponse("<h1>404</h1>", status_code=404)
-    return DASHBOARD_HTML.replace("{{SECRET_KEY}}", secret_key).replace("{{DASHBOARD_PASSWORD}}", DASHBOARD_PASSWORD)
+    return asset_response(request, DASHBOARD_ASSET)
+
+
+@app.get("/static/dashboard-{digest}.css")
+async def dashboard_css(digest: str, request: Request):
+    if f"/static/dashboard-{digest}.css" != DASHBOARD_CSS_PATH:
+        return Response(status_code=404)
+    return asset_response(request, DASHBOARD_CSS_ASSET)
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
@@ -1654,13 +2453,55 @@ async def dashboard_redirect():
     return HTMLResponse("<h1>404</h1>", status_code=404)
 
 
-# --- API endpoints ---
-@app.get("/api/dashboard")
-async def dashboard_data(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
+# --- Dashboard auth ---
+DASHBOARD_COOKIE = "rb_session"
+# TLS ends at the platform proxy, so the request scheme here is always http: mark the
+# cookie Secure unless explicitly running over plain http (DASHBOARD_INSECURE_COOKIE=1)
+DASHBOARD_COOKIE_SECURE = os.getenv("DASHBOARD_INSECURE_COOKIE") != "1"
+DASHBOARD_SESSION_TTL = 12 * 3600
+dashboard_sessions = {}  # session token: expiry (time.time())
+
+
+def is_dashboard_authorized(request: Request) -> bool:
+    """Dashboard session cookie, or ?key=DASHBOARD_SECRET for scripts."""
+    expires = dashboard_sessions.get(request.cookies.get(DASHBOARD_COOKIE, ""))
+    if expires is not None and expires > time.time():
+        return True
+    return secret_matches(request.query_params.get("key", ""), DASHBOARD_SECRET)
+
+
+def require_dashboard(request: Request):
+    """Shared guard for every /api/* dashboard endpoint (login excepted)."""
+    if not is_dashboard_authorized(request):
+        raise HTTPException(status_code=403)
+
+
+@app.post("/api/login")
+async def login(request: Request):
+    try:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return Response(status_code=400)
+    if not isinstance(data, dict):
+        return Response(status_code=400)
+    if not secret_matches(str(data.get("password", "")), DASHBOARD_PASSWORD):
         return Response(status_code=403)
-    pid = list(restaurants.keys())[0] if restaurants else None
+    now = time.time()
+    for token in [t for t, exp in dashboard_sessions.items() if exp <= now]:
+        del dashboard_sessions[token]
+    token = secrets.token_urlsafe(32)
+    dashboard_sessions[token] = now + DASHBOARD_SESSION_TTL
+    response = ORJSONResponse({"status": "ok"})
+    response.set_cookie(
+        DASHBOARD_COOKIE, token, max_age=DASHBOARD_SESSION_TTL,
+        httponly=True, samesite="strict", secure=DASHBOARD_COOKIE_SECURE,
+    )
+    return response
+
+
+# --- API endpoints ---
+def build_dashboard_data() -> dict:
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"stats": {}, "status": {}, "conversations_count": 0, "recent_conversations": []}
     st = stats.get(pid, {})
@@ -1671,88 +2512,126 @@ async def dashboard_data(request: Request):
         st["languages"] = {}
         st["last_reset"] = today_str
     status = restaurant_status.get(pid, {})
+    threads = conversations.get(pid, {})
     recent = []
-    for k, msgs in sorted(conversations.items(), key=lambda x: x[1][-1]["timestamp"] if x[1] else "", reverse=True)[:20]:
-        if not msgs:
-            continue
-        phone = k.split(":")[1] if ":" in k else k
-        last = msgs[-1]
-        recent.append({"phone": phone, "last_message": last["content"][:100], "time": last.get("timestamp", "")[:16].replace("T", " ")})
-    return {"stats": st, "status": status, "conversations_count": sum(1 for k in conversations if k.startswith(pid)), "recent_conversations": recent}
+    for phone in islice(reversed(threads), 20):
+        last = threads[phone][-1]
+        recent.append({"phone": phone, "last_message": last["content"][:100], "time": last["time"]})
+    return {"stats": st, "status": status, "conversations_count": len(threads), "recent_conversations": recent}
+
+
+CONVERSATIONS_PAGE = 100  # most recently active first
+CONVERSATIONS_PAGE_MAX = 500
+
+
+def build_conversations_data(limit: int = CONVERSATIONS_PAGE, offset: int = 0) -> dict:
+    """One page of threads; only the slice is visited, not every conversation."""
+    pid = dashboard_restaurant_id()
+    if not pid:
+        return {"conversations": [], "total": 0}
+    result = []
+    threads = conversations.get(pid, {})
+    for phone in islice(reversed(threads), offset, offset + limit):
+        msgs = threads[phone]
+        result.append({"phone": phone, "messages": list(msgs), "last_message": msgs[-1]["content"][:100], "last_time": msgs[-1]["time"], "count": len(msgs)})
+    return {"conversations": result, "total": len(threads)}
+
+
+@app.get("/api/all", dependencies=[Depends(require_dashboard)])
+async def all_data(request: Request):
+    """Dashboard, conversations and bookings in one round-trip for the initial load."""
+    return cached_json(request, revision_etag("dashboard", "conversations", "bookings"), lambda: {
+        "dashboard": build_dashboard_data(),
+        "conversations": build_conversations_data(),
+        "bookings": {"bookings": recent_bookings(50)},
+    })
 
 
-@app.post("/api/status")
+@app.get("/api/dashboard", dependencies=[Depends(require_dashboard)])
+async def dashboard_data(request: Request):
+    return cached_json(request, revision_etag("dashboard"), build_dashboard_data)
+
+
+RESTAURANT_STATUSES = frozenset({"open", "full_tonight", "full_lunch", "closed_today"})
+
+
+@app.post("/api/status", dependencies=[Depends(require_dashboard)])
 async def update_status(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
+    value = data.get("status", "open")
+    if value not in RESTAURANT_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
     status = restaurant_status.get(pid, {})
-    status["status"] = data.get("status", "open")
+    status["status"] = value
     status["updated_at"] = datetime.utcnow().isoformat()
+    publish_dashboard(pid)
     return {"status": "updated"}
 
 
-@app.post("/api/message")
+@app.post("/api/message", dependencies=[Depends(require_dashboard)])
 async def update_message(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
+    message = data.get("message", "")
+    if not isinstance(message, str):
+        raise HTTPException(status_code=400, detail="Invalid message")
     status = restaurant_status.get(pid, {})
-    status["temp_message"] = data.get("message", "")
+    status["temp_message"] = message
+    publish_dashboard(pid)
     return {"status": "updated"}
 
 
-@app.get("/api/conversations")
-async def list_conversations(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    pid = list(restaurants.keys())[0] if restaurants else None
-    if not pid:
-        return {"conversations": []}
-    result = []
-    for k, msgs in sorted(conversations.items(), key=lambda x: x[1][-1]["timestamp"] if x[1] else "", reverse=True):
-        if not k.startswith(pid) or not msgs:
-            continue
-        phone = k.split(":")[1] if ":" in k else k
-        result.append({"phone": phone, "messages": [{"role": m["role"], "content": m["content"], "time": m.get("timestamp", "")[:16].replace("T", " ")} for m in msgs], "last_message": msgs[-1]["content"][:100], "last_time": msgs[-1].get("timestamp", "")[:16].replace("T", " "), "count": len(msgs)})
-    return {"conversations": result}
+@app.get("/api/conversations", dependencies=[Depends(require_dashboard)])
+async def list_conversations(request: Request, limit: int = CONVERSATIONS_PAGE, offset: int = 0):
+    limit = max(1, min(limit, CONVERSATIONS_PAGE_MAX))
+    offset = max(0, offset)
+    return cached_json(request, revision_etag("conversations"), lambda: build_conversations_data(limit, offset))
+
+
+@app.get("/api/stream", dependencies=[Depends(require_dashboard)])
+async def stream_events():
+    """Live dashboard updates, replacing the 15 s polling."""
+    listener = asyncio.Queue(maxsize=100)
+    dashboard_listeners.add(listener)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(listener.get(), SSE_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            dashboard_listeners.discard(listener)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.get("/api/bookings")
+@app.get("/api/bookings", dependencies=[Depends(require_dashboard)])
 async def list_bookings(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    return {"bookings": bookings[-50:]}
+    return cached_json(request, revision_etag("bookings"), lambda: {"bookings": recent_bookings(50)})
 
 
-@app.get("/api/floorplan")
-async def get_floorplan(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    pid = list(restaurants.keys())[0] if restaurants else None
+@app.get("/api/floorplan", dependencies=[Depends(require_dashboard)])
+async def get_floorplan():
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"tables": [], "slots": {}, "bookings": []}
-    return {"tables": floor_tables.get(pid, []), "slots": table_slots.get(pid, {}), "bookings": bookings[-100:], "slot_summary": get_slot_summary(pid)}
+    return {"tables": floor_tables.get(pid, []), "slots": table_slots.get(pid, {}), "bookings": recent_bookings(100), "slot_summary": get_slot_summary(pid)}
 
 
-@app.post("/api/floorplan/assign")
+@app.post("/api/floorplan/assign", dependencies=[Depends(require_dashboard)])
 async def assign_table_api(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
     booking_id = data.get("booking_id")
@@ -1768,16 +2647,14 @@ async def assign_table_api(request: Request):
             b["status"] = "confirmed"
             break
     assign_table(pid, slot_time, table_id, booking_id)
+    publish_event("booking", {"id": booking_id})
     return {"status": "assigned"}
 
 
-@app.post("/api/floorplan/release")
+@app.post("/api/floorplan/release", dependencies=[Depends(require_dashboard)])
 async def release_table_api(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
     booking_id = data.get("booking_id")
@@ -1787,35 +2664,27 @@ async def release_table_api(request: Request):
             b["table"] = None
             b["status"] = "pending"
             break
+    publish_event("booking", {"id": booking_id})
     return {"status": "released"}
 
 
-@app.get("/api/reviews")
-async def get_reviews(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
+@app.get("/api/reviews", dependencies=[Depends(require_dashboard)])
+async def get_reviews():
     return {"queue": review_queue[-50:], "stats": {"total": len(review_queue), "sent": sum(1 for r in review_queue if r.get("sent")), "responded": sum(1 for r in review_queue if r.get("responded")), "positive": sum(1 for r in review_queue if r.get("sentiment") == "POSITIVE"), "negative": sum(1 for r in review_queue if r.get("sentiment") == "NEGATIVE")}}
 
 
-@app.get("/api/contacts")
-async def get_contacts(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    contact_list = sorted(contacts.values(), key=lambda c: c.get("last_seen", ""), reverse=True)
+@app.get("/api/contacts", dependencies=[Depends(require_dashboard)])
+async def get_contacts():
+    # Top 200 by last_seen in one pass instead of sorting every contact
     return {
-        "contacts": contact_list[:200],
+        "contacts": heapq.nlargest(200, contacts.values(), key=itemgetter("last_seen")),
         "total": len(contacts),
     }
 
 
-@app.post("/api/contacts/tag")
+@app.post("/api/contacts/tag", dependencies=[Depends(require_dashboard)])
 async def tag_contact(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
+    data = orjson.loads(await request.body())
     phone = data.get("phone")
     tag = data.get("tag", "")
     if phone in contacts and tag:
@@ -1824,12 +2693,9 @@ async def tag_contact(request: Request):
     return {"status": "ok"}
 
 
-@app.post("/api/contacts/note")
+@app.post("/api/contacts/note", dependencies=[Depends(require_dashboard)])
 async def note_contact(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
+    data = orjson.loads(await request.body())
     phone = data.get("phone")
     note = data.get("note", "")
     if phone in contacts:
@@ -1838,12 +2704,9 @@ async def note_contact(request: Request):
 
 
 # --- Restaurant Config (self-service) ---
-@app.get("/api/config")
-async def get_config(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    pid = list(restaurants.keys())[0] if restaurants else None
+@app.get("/api/config", dependencies=[Depends(require_dashboard)])
+async def get_config():
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
     r = restaurants[pid]
@@ -1863,13 +2726,10 @@ async def get_config(request: Request):
     }
 
 
-@app.post("/api/config")
+@app.post("/api/config", dependencies=[Depends(require_dashboard)])
 async def update_config(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
     r = restaurants[pid]
@@ -1880,26 +2740,24 @@ async def update_config(request: Request):
             ctx[field] = data[field]
     if "name" in data:
         r["name"] = data["name"]
+    set_static_prompt(r)
     # Update tables if provided
     if "tables" in data:
         floor_tables[pid] = data["tables"]
         init_daily_slots(pid)
-    logger.info(f"✏️ Config updated: {list(data.keys())}")
+    logger.info("✏️ Config updated: %s", list(data))
     return {"status": "updated"}
 
 
 # --- Manual Booking ---
-@app.post("/api/bookings/add")
+@app.post("/api/bookings/add", dependencies=[Depends(require_dashboard)])
 async def add_manual_booking(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
 
-    booking_id = f"R{len(bookings)+1}"
+    booking_id = f"R{next(booking_ids)}"
     name = data.get("name", "")
     covers = int(data.get("covers", 2))
     booking_time = data.get("time", "")
@@ -1920,7 +2778,7 @@ async def add_manual_booking(request: Request):
         "phone": phone,
         "name": name or phone or "Client",
         "message": notes,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _now_iso(),
         "status": "confirmed" if assigned_table else "pending",
         "time": booking_time,
         "covers": covers,
@@ -1934,17 +2792,15 @@ async def add_manual_booking(request: Request):
         track_contact(phone, name)
 
     track_stats(pid, is_booking=True)
-    logger.info(f"📝 Manual booking {booking_id}: {name} {covers}p @ {booking_time} -> {assigned_table or 'unassigned'}")
+    publish_event("booking", {"id": booking_id})
+    logger.info("📝 Manual booking %s: %s %sp @ %s -> %s", booking_id, name, covers, booking_time, assigned_table or "unassigned")
     return {"status": "created", "booking_id": booking_id, "table": assigned_table}
 
 
 # --- Dashboard visibility settings ---
-@app.get("/api/settings")
-async def get_settings(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    pid = list(restaurants.keys())[0] if restaurants else None
+@app.get("/api/settings", dependencies=[Depends(require_dashboard)])
+async def get_settings():
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"pages": {}}
     return {"pages": restaurant_status.get(pid, {}).get("dashboard_pages", {
@@ -1953,17 +2809,15 @@ async def get_settings(request: Request):
     })}
 
 
-@app.post("/api/settings")
+@app.post("/api/settings", dependencies=[Depends(require_dashboard)])
 async def update_settings(request: Request):
-    key = request.query_params.get("key", "")
-    if key != DASHBOARD_SECRET:
-        return Response(status_code=403)
-    data = await request.json()
-    pid = list(restaurants.keys())[0] if restaurants else None
+    data = orjson.loads(await request.body())
+    pid = dashboard_restaurant_id()
     if not pid:
         return {"error": "No restaurant"}
     status = restaurant_status.get(pid, {})
     status["dashboard_pages"] = data.get("pages", {})
+    publish_dashboard(pid)
     return {"status": "updated"}
 
 
@@ -1983,4 +2837,5 @@ async def terms():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    # One worker on purpose: conversations, bookings and sessions live in this process's memory
+    uvicorn.run(app, host="0.0.0.0", port=PORT, loop="uvloop", http="httptools", access_log=False)